@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# Benchmark pentru caile fierbinti ale motorului de joc (play_candycrush.py)
+
+import argparse
+# Modul pentru argumentele din linia de comanda
+
+import json
+# Rezultatele se salveaza in JSON, ca doua revizii sa poata fi comparate
+
+import platform
+# Informatii despre masina, salvate langa rezultate
+
+import random
+# Table initiale reproductibile
+
+import sys
+# Codul de iesire cand apare o regresie
+
+import time
+# Masurarea timpului (perf_counter_ns)
+
+import tracemalloc
+# Masurarea memoriei maxime alocate
+
+from play_candycrush import (ENGINES, SELECTIONS, Board, RefillStream, ensure_dir, np, parse_size, percentile,
+                             play_single_game, select_non_overlapping)
+
+
+BENCHMARKS = ['detect_formations', 'apply_gravity_and_refill', 'resolve_all_cascades',
+              'find_best_swap', 'play_single_game']
+# Caile masurate, in ordinea in care ruleaza
+
+
+def make_grid(rows, cols, seed):
+    # Tabla initiala fixa pentru un seed (aceeasi pe orice engine)
+
+    rng = random.Random(seed)
+    return [[rng.randint(1, 4) for _ in range(cols)] for _ in range(rows)]
+
+
+def make_board(engine, rows, cols, seed, stable=True):
+    # Tabla fixa pentru un seed: optional stabilizata (fara formatii)
+
+    board = ENGINES[engine](rows, cols, grid=make_grid(rows, cols, seed))
+
+    if stable:
+        board.resolve_all_cascades(rng=RefillStream(seed))
+
+    return board
+
+
+def holes_board(engine, rows, cols, seed):
+    # Tabla instabila cu formatiile de pe primul nivel deja eliminate,
+    # adica exact starea de dinainte de apply_gravity_and_refill
+
+    board = make_board(engine, rows, cols, seed, stable=False)
+    forms = board.detect_formations()
+    board.apply_eliminations(select_non_overlapping(forms))
+
+    return board
+
+
+def cases(engine, rows, cols, seed, target):
+    # Pentru fiecare benchmark: (pregatire, functie masurata)
+    # Pregatirea nu intra in timpul masurat
+
+    stable = make_board(engine, rows, cols, seed)
+    fresh = make_board(engine, rows, cols, seed, stable=False)
+    holes = holes_board(engine, rows, cols, seed)
+    grid = make_grid(rows, cols, seed)
+    # Fiecare joc masurat porneste de la aceeasi tabla
+
+    return {
+        'detect_formations': (lambda: stable, lambda b: b.detect_formations()),
+        'apply_gravity_and_refill': (holes.copy, lambda b: b.apply_gravity_and_refill(RefillStream(seed))),
+        'resolve_all_cascades': (fresh.copy, lambda b: b.resolve_all_cascades(RefillStream(seed))),
+        'find_best_swap': (stable.copy, lambda b: b.find_best_swap(stream=RefillStream(seed))),
+        # O copie noua la fiecare apel, ca fiecare apel sa isi construiasca indexul de mutari
+        'play_single_game': (lambda: None, lambda _: play_single_game(rows, cols, target, seed=seed,
+                                                                       engine=engine, grid=grid)),
+    }
+
+
+def measure(setup, fn, min_time, min_iters, max_iters):
+    # Ruleaza fn pana acumuleaza min_time secunde (si cel putin min_iters apeluri)
+    # si intoarce statisticile; memoria maxima se masoara intr-un apel separat,
+    # ca tracemalloc sa nu incetineasca apelurile cronometrate
+
+    times = []
+    total = 0
+
+    while len(times) < max_iters and (total < min_time * 1e9 or len(times) < min_iters):
+        state = setup()
+        t0 = time.perf_counter_ns()
+        fn(state)
+        dt = time.perf_counter_ns() - t0
+        times.append(dt)
+        total += dt
+
+    state = setup()
+    tracemalloc.start()
+    fn(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times.sort()
+
+    return {
+        'calls': len(times),
+        'ops_per_sec': len(times) / (total / 1e9) if total else 0.0,
+        'mean_us': total / len(times) / 1e3,
+        'p50_us': percentile(times, 50) / 1e3,
+        'p90_us': percentile(times, 90) / 1e3,
+        'p99_us': percentile(times, 99) / 1e3,
+        'peak_kib': peak / 1024,
+    }
+
+
+def run(engines, sizes, benchmarks, seed, target, min_time, min_iters, max_iters, log=None):
+    # Ruleaza toate combinatiile si intoarce {"engine/benchmark/RxC": statistici}
+
+    results = {}
+
+    for engine in engines:
+        for rows, cols in sizes:
+            table = cases(engine, rows, cols, seed, target)
+
+            for name in benchmarks:
+                key = f'{engine}/{name}/{rows}x{cols}'
+                setup, fn = table[name]
+                results[key] = measure(setup, fn, min_time, min_iters, max_iters)
+
+                if log:
+                    r = results[key]
+                    log(f"{key:45s} {r['ops_per_sec']:12.1f} ops/s  p50 {r['p50_us']:12.1f} us  "
+                        f"p99 {r['p99_us']:12.1f} us  peak {r['peak_kib']:10.1f} KiB")
+
+    return results
+
+
+def compare(current, baseline, threshold, metric='p50_us'):
+    # Intoarce lista regresiilor: cazurile comune in care metric a crescut
+    # cu mai mult de threshold procente fata de baseline
+
+    regressions = []
+
+    for key, now in current.items():
+        old = baseline.get(key)
+
+        if old is None or not old.get(metric):
+            continue
+
+        change = (now[metric] - old[metric]) / old[metric] * 100
+
+        if change > threshold:
+            regressions.append((key, old[metric], now[metric], change))
+
+    return regressions
+
+
+def selection_report(sizes, seed, boards, log=None):
+    # Compara strategiile de selectie (greedy / optimal) pe aceleasi table random:
+    # scorul si timpul doar pentru selectie, apoi pentru cascade complete
+
+    report = {}
+
+    for rows, cols in sizes:
+        grids = []
+
+        for k in range(boards):
+            random.seed(seed + k)
+            grids.append(Board(rows, cols).to_rows())
+
+        form_lists = [Board(rows, cols, grid=g).detect_formations() for g in grids]
+
+        for name, select in SELECTIONS.items():
+            t0 = time.perf_counter_ns()
+            score = sum(f.score for forms in form_lists for f in select(forms))
+            select_ns = time.perf_counter_ns() - t0
+
+            cascade_score = 0
+            cascade_ns = 0
+
+            for k, g in enumerate(grids):
+                board = Board(rows, cols, grid=g)
+                board.select = select
+                t0 = time.perf_counter_ns()
+                cascade_score += board.resolve_all_cascades(RefillStream(seed + k))[0]
+                cascade_ns += time.perf_counter_ns() - t0
+
+            key = f'selection/{name}/{rows}x{cols}'
+            report[key] = {
+                'boards': boards,
+                'first_level_score': score,
+                'select_us': select_ns / boards / 1e3,
+                'cascade_score': cascade_score,
+                'cascade_us': cascade_ns / boards / 1e3,
+            }
+
+            if log:
+                r = report[key]
+                log(f"{key:45s} scor {r['first_level_score']:9d} in {r['select_us']:9.1f} us/tabla  "
+                    f"cascade {r['cascade_score']:9d} in {r['cascade_us']:9.1f} us/tabla")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pentru motorul CandyCrush')
+
+    parser.add_argument('--engines', nargs='+', default=['python'], choices=sorted(ENGINES))
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[(11, 11), (21, 21), (51, 51)],
+                        help='dimensiuni de tabla, de ex. 11 21 30x40')
+    parser.add_argument('--bench', nargs='+', default=BENCHMARKS, choices=BENCHMARKS)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--target', type=int, default=1000,
+                        help='pragul pentru benchmark-ul play_single_game')
+    parser.add_argument('--min-time', type=float, default=1.0,
+                        help='secunde cronometrate pe caz (cel putin)')
+    parser.add_argument('--min-iters', type=int, default=3)
+    parser.add_argument('--max-iters', type=int, default=10000)
+    parser.add_argument('--out', type=str, default='results/bench.json')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='JSON cu rezultate anterioare; iese cu cod 1 la regresie')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='incetinirea maxima acceptata, in procente (pentru --compare)')
+    parser.add_argument('--selection-report', type=int, default=0, metavar='BOARDS',
+                        help='compara selectia greedy cu cea optima pe BOARDS table random')
+    parser.add_argument('--metric', default='p50_us', choices=['p50_us', 'p90_us', 'p99_us', 'mean_us'])
+
+    args = parser.parse_args()
+
+    if 'numpy' in args.engines and np is None:
+        parser.error('--engines numpy necesita pachetul numpy')
+
+    baseline = None
+
+    if args.compare:
+        try:
+            with open(args.compare) as fh:
+                baseline = json.load(fh)['results']
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f'--compare {args.compare}: {e}')
+        # Citim referinta inainte de rulare: --out poate fi chiar acelasi fisier
+
+    results = run(args.engines, args.sizes, args.bench, args.seed, args.target,
+                  args.min_time, args.min_iters, args.max_iters, log=print)
+
+    if args.selection_report:
+        results.update(selection_report(args.sizes, args.seed, args.selection_report, log=print))
+
+    ensure_dir(args.out)
+
+    with open(args.out, 'w') as fh:
+        json.dump({
+            'meta': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'seed': args.seed,
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'results': results,
+        }, fh, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.metric)
+
+        for key, old, now, change in regressions:
+            print(f'REGRESIE {key}: {args.metric} {old:.1f} -> {now:.1f} us ({change:+.1f}%)')
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,30 +4,107 @@
 import argparse
 # Modul pentru a citi argumente din linia de comanda (ex: --games 100)
 
+import array
+# Coloane tipizate pentru formatul binar de rezultate (--out-format columnar)
+
+import cProfile
+# Profilare optionala pe proces (--profile-dir), salvata ca fisiere pstats
+
 import csv
 # Modul pentru a scrie rezultate in fisiere CSV
 
+import itertools
+# Modul pentru parcurgerea pe loturi a jocurilor
+
+import json
+# Modul pentru citirea tablelor predefinite din JSON
+
+import mmap
+# Modul pentru maparea in memorie a fisierelor binare cu table
+
+import multiprocessing
+# Modul pentru rularea jocurilor in paralel pe mai multe procese
+
 import os
 # Modul pentru lucrul cu fisiere si directoare
 
 import random
 # Modul pentru generare de numere aleatoare (bomboane, refill)
 
+import struct
+# Modul pentru antetul fisierelor binare cu table
+
 import sys
-# Modul pentru interactiune cu sistemul (nu este folosit direct aici)
+# Ordinea octetilor (sys.byteorder) pentru formatul binar de rezultate
+
+import time
+# Bugetul de timp pe mutare al jucatorului cu cautare (SearchPlayer)
+
+from collections import OrderedDict, defaultdict
+# OrderedDict tine ordinea LRU in TranspositionTable
+
+try:
+    import numpy as np
+    # Optional: folosit doar de engine-ul NumpyBoard (--engine numpy)
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    # Optional: folosit doar pentru --out-format parquet
+except ImportError:
+    pa = pq = None
+
+
+class Formation:
+    """
+    O formatie gasita pe tabla, in forma compacta:
+    mask = celulele, ca bitmask peste indicii plati r * stride + c
+    score = punctajul formatiei
+    type = tipul formatiei (LINE3, L33 etc.)
+    size = numarul de celule
+    Suprapunerea a doua formatii este un singur AND intre masti;
+    cells (setul de coordonate) se calculeaza doar la cerere, pentru ui_tk.py.
+    """
+
+    __slots__ = ('mask', 'score', 'type', 'size', 'stride')
 
-from collections import defaultdict, namedtuple
-# namedtuple este folosit pentru structura Formation
+    def __init__(self, mask, score, type, size, stride):
+        self.mask = mask
+        self.score = score
+        self.type = type
+        self.size = size
+        self.stride = stride
 
-from copy import deepcopy
-# deepcopy permite copierea completa a grid-ului fara referinte comune
+    @classmethod
+    def from_cells(cls, cells, score, type, stride):
+        # Construieste formatia dintr-un set de coordonate (r, c)
+        mask = 0
+        for r, c in cells:
+            mask |= 1 << (r * stride + c)
+        return cls(mask, score, type, len(cells), stride)
 
+    @property
+    def cells(self):
+        # Setul de coordonate (r, c), decodat din masca
+        return {divmod(i, self.stride) for i in mask_indices(self.mask)}
 
-# Definitie pentru o formatie gasita pe tabla
-# cells = set de coordonate
-# score = punctajul formatiei
-# type = tipul formatiei (LINE3, L33 etc.)
-Formation = namedtuple('Formation', ['cells', 'score', 'type'])
+    def __repr__(self):
+        return f'Formation({self.type}, score={self.score}, cells={sorted(self.cells)})'
+
+
+def mask_indices(mask):
+    # Indicii bitilor setati dintr-o masca, crescator
+
+    out = []
+
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+
+    return out
 
 
 # Dictionar cu punctajele pentru fiecare tip de formatie
@@ -40,8 +117,260 @@ SCORES = {
 }
 
 
+# Deplasarile (dr, dc) ale celulelor pentru cele 4 forme de L si 4 forme de T,
+# in aceeasi ordine in care le verifica Board.detect_formations
+L_SHAPES = (
+    ((0, 0), (0, 1), (0, 2), (1, 0), (2, 0)),       # L spre dreapta jos
+    ((0, 0), (0, -1), (0, -2), (1, 0), (2, 0)),     # L spre stanga jos
+    ((0, 0), (0, 1), (0, 2), (-1, 0), (-2, 0)),     # L spre dreapta sus
+    ((0, 0), (0, -1), (0, -2), (-1, 0), (-2, 0)),   # L spre stanga sus
+)
+
+T_SHAPES = (
+    ((0, 0), (1, 0), (2, 0), (1, -1), (1, 1)),      # T cu tija in jos
+    ((0, 0), (-1, 0), (-2, 0), (-1, -1), (-1, 1)),  # T cu tija in sus
+    ((0, 0), (0, 1), (0, 2), (-1, 1), (1, 1)),      # T orizontal spre dreapta
+    ((0, 0), (0, -1), (0, -2), (-1, -1), (1, -1)),  # T orizontal spre stanga
+)
+
+
+MOVE_PATTERNS = (
+    ((0, 1), (0, 3)), ((0, 2), (0, 3)),     # AA.A si A.AA pe rand
+    ((0, 1), (-1, 2)), ((0, 1), (1, 2)),    # AA. cu A deasupra / dedesubtul golului
+    ((0, 1), (-1, -1)), ((0, 1), (1, -1)),  # .AA cu A deasupra / dedesubtul golului
+    ((0, 2), (-1, 1)), ((0, 2), (1, 1)),    # A.A cu A deasupra / dedesubtul golului
+    ((1, 0), (3, 0)), ((2, 0), (3, 0)),     # aceleasi sabloane pe coloana
+    ((1, 0), (2, -1)), ((1, 0), (2, 1)),
+    ((1, 0), (-1, -1)), ((1, 0), (-1, 1)),
+    ((2, 0), (1, -1)), ((2, 0), (1, 1)),
+)
+# Sabloanele de mutare: pe o tabla stabila exista un swap care formeaza ceva
+# daca si numai daca o celula (0, 0) si cele doua celule de la offset-urile
+# date au aceeasi culoare (un singur swap le aduce intr-o linie de 3;
+# orice formatie contine o astfel de linie)
+
+
+_COLUMN_RUNS = {}
+# Mastile pentru secvente verticale, pe dimensiune de tabla
+
+
+def column_run_masks(rows, cols):
+    # column_run_masks(rows, cols)[n] = masca a n celule consecutive pe o coloana
+    # incepand de la indicele 0 (un bit la fiecare cols pozitii)
+
+    masks = _COLUMN_RUNS.get((rows, cols))
+
+    if masks is None:
+        masks = [0]
+        for n in range(rows):
+            masks.append(masks[-1] | (1 << (n * cols)))
+        _COLUMN_RUNS[(rows, cols)] = masks
+
+    return masks
+
+
+_SHAPE_TABLES = {}
+# Tabelele de forme deja construite, pe numar de coloane
+
+
+def shape_tables(cols):
+    # Pentru fiecare forma de L si T: (deplasari, masca relativa, deplasarea minima).
+    # Masca formatiei ancorate in indicele plat a este masca << (a + deplasarea minima).
+
+    tables = _SHAPE_TABLES.get(cols)
+
+    if tables is None:
+        tables = {}
+
+        for kind, shapes in (('L33', L_SHAPES), ('T333', T_SHAPES)):
+            rows = []
+            for shape in shapes:
+                flat = [dr * cols + dc for dr, dc in shape]
+                low = min(flat)
+                mask = 0
+                for i in flat:
+                    mask |= 1 << (i - low)
+                rows.append((shape, mask, low))
+            tables[kind] = rows
+
+        _SHAPE_TABLES[cols] = tables
+
+    return tables
+
+
+BORDER = 255
+# Valoarea celulelor de bordura din grid-ul plat al lui Board (nu este o bomboana)
+
+PAD = 3
+# Latimea bordurii: formele de L/T ajung la 2 celule de ancora, sabloanele
+# de mutare la 3, deci niciun acces nu iese din buffer si nu e nevoie de in_bounds
+
+
+class GridLayout:
+    """
+    Tabelele precalculate pentru grid-ul plat al unei table rows x cols:
+    celula (r, c) este la indicele (r + PAD) * stride + c + PAD intr-un
+    bytearray cu bordura BORDER de PAD celule pe fiecare parte.
+    row_start[r] = indicele celulei (r, 0); pos[i] = indicele plat al celulei
+    cu indicele compact i = r * cols + c (cel din mastile Formation);
+    zobrist[p] = cheile celulei p; shapes = deplasarile formelor L/T;
+    moves = deplasarile din MOVE_PATTERNS; anchors = (i, p) pentru toate celulele.
+    """
+
+    __slots__ = ('rows', 'cols', 'stride', 'row_start', 'pos', 'zobrist', 'empty',
+                 'shapes', 'moves', 'anchors')
+
+    def __init__(self, rows, cols):
+        w = cols + 2 * PAD
+        self.rows, self.cols, self.stride = rows, cols, w
+        self.row_start = [(r + PAD) * w + PAD for r in range(rows)]
+        self.pos = [start + c for start in self.row_start for c in range(cols)]
+
+        keys = zobrist_keys(rows, cols)
+        self.zobrist = [None] * ((rows + 2 * PAD) * w)
+        for i, p in enumerate(self.pos):
+            self.zobrist[p] = keys[i // cols][i % cols]
+
+        empty = bytearray([BORDER]) * len(self.zobrist)
+        for p in self.pos:
+            empty[p] = 0
+        self.empty = bytes(empty)
+
+        self.shapes = {
+            kind: [(tuple(dr * w + dc for dr, dc in shape[1:]), mask, low) for shape, mask, low in table]
+            for kind, table in shape_tables(cols).items()
+        }
+        # Fiecare forma are 4 deplasari (fara ancora, care este (0, 0))
+
+        self.moves = tuple((dr1 * w + dc1, dr2 * w + dc2) for (dr1, dc1), (dr2, dc2) in MOVE_PATTERNS)
+        self.anchors = list(enumerate(self.pos))
+
+
+_LAYOUTS = {}
+# GridLayout deja construite, pe dimensiune de tabla
+
+
+def grid_layout(rows, cols):
+    layout = _LAYOUTS.get((rows, cols))
+
+    if layout is None:
+        layout = _LAYOUTS[(rows, cols)] = GridLayout(rows, cols)
+
+    return layout
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(x):
+    # Functia de amestec SplitMix64: transforma un contor intr-o valoare
+    # pseudo-aleatoare de 64 biti, fara stare
+
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class RefillStream:
+    """
+    Sursa determinista de bomboane pentru refill, bazata pe contor:
+    valoarea a i-a depinde doar de cheie si de i, nu de ce alte simulari
+    au rulat inainte. Cheia este un tuplu de intregi, iar child(...) o
+    extinde, de ex. (seed joc) -> (mutare) -> (swap candidat) -> (cascada).
+    Are aceeasi interfata randint ca random.Random, deci poate fi dat ca rng.
+    """
+
+    __slots__ = ('key', 'state', 'counter')
+
+    def __init__(self, *key, _state=0):
+        # _state este starea deja amestecata a parintelui (vezi child)
+
+        self.key = key
+        self.counter = 0
+
+        for part in key:
+            _state = _splitmix64(_state ^ (part & _MASK64))
+
+        self.state = _state
+
+    def child(self, *key):
+        # Sub-flux independent, indexat de cheie (refoloseste starea parintelui)
+
+        sub = RefillStream(*key, _state=self.state)
+        sub.key = self.key + key
+
+        return sub
+
+    def randint(self, a, b):
+        self.counter += 1
+        return a + _splitmix64((self.state + self.counter * 0x9E3779B97F4A7C15) & _MASK64) % (b - a + 1)
+
+
+_ZOBRIST = {}
+# Cheile Zobrist deja generate, pe dimensiune de tabla
+
+
+def zobrist_keys(rows, cols):
+    # Cate o cheie aleatoare de 64 biti pentru fiecare (celula, valoare 0..4).
+    # Hash-ul tablei este XOR-ul cheilor celulelor ei; cheile sunt generate
+    # dintr-un seed fix, deci hash-ul este acelasi in toate procesele.
+
+    keys = _ZOBRIST.get((rows, cols))
+
+    if keys is None:
+        gen = random.Random((rows << 16) | cols)
+        keys = [[tuple(gen.getrandbits(64) for _ in range(5)) for _ in range(cols)]
+                for _ in range(rows)]
+        _ZOBRIST[(rows, cols)] = keys
+
+    return keys
+
+
+class TranspositionTable:
+    """
+    Cache LRU marginit pentru rezultatul simularii unui swap:
+    (hash tabla, swap, flux de refill) -> (scor, cascade).
+    Folosit de SearchPlayer (beam / expectimax), care ajunge la aceeasi
+    pozitie pe mai multe drumuri; jucatorul greedy nu repeta nicio simulare.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        # Intrarea devine cea mai recent folosita
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            # Eliminam intrarea folosita cel mai demult
+
+    def __len__(self):
+        return len(self.entries)
+
+
 class Board:
     # Clasa care reprezinta tabla de joc
+    # Grid-ul este un bytearray plat cu bordura (vezi GridLayout): fara liste
+    # de liste si fara verificari de limite in buclele fierbinti.
+    # cell / set_cell / grid raman interfata pentru ui_tk.py si teste
 
     def __init__(self, rows=11, cols=11, seed=None, grid=None):
         # Constructorul clasei Board
@@ -52,22 +381,90 @@ class Board:
         self.cols = cols
         # Numar de coloane
 
-        if grid is not None:
-            # Daca primim un grid deja existent
-            self.grid = [list(r) for r in grid]
-            # Copiem fiecare rand ca lista separata
-        else:
-            # Altfel generam un grid random
-            self.grid = [[random.randint(1, 4) for _ in range(cols)] for _ in range(rows)]
+        layout = grid_layout(rows, cols)
+        self.layout = layout
+        self.flat = bytearray(layout.empty)
+        # Grid-ul plat, cu bordura
+
+        if grid is None:
+            # Generam un grid random, rand cu rand (aceeasi ordine ca inainte)
+            grid = [[random.randint(1, 4) for _ in range(cols)] for _ in range(rows)]
             # Fiecare celula primeste o bomboana intre 1 si 4
 
+        for start, row in zip(layout.row_start, grid):
+            self.flat[start:start + cols] = bytes(row)
+            # Copiem fiecare rand in buffer
+
         self.rng = random.Random(seed)
         # Generator random local pentru reproductibilitate
 
+        self.dirty_cols = None
+        # Coloanele schimbate la ultimul apply_gravity_and_refill
+
+        self.zobrist = zobrist_keys(rows, cols)
+        self.hash = self.compute_hash()
+        # Hash Zobrist, actualizat incremental la fiecare scriere in grid
+
+        self.select = select_non_overlapping
+        # Strategia de selectie a formatiilor in cascade (vezi SELECTIONS)
+
+        self.journal = None
+        # Jurnal (indice plat, valoare veche) al scrierilor, activ doar intre mark() si undo()
+
+        self.move_index = None
+        # Indexul swap-urilor care formeaza ceva (set), construit de candidate_swaps
+        self.touched = {}
+        # Celulele scrise de la ultima actualizare a indexului: {col: cel mai jos rand}
+        self.stable = False
+        # True cand stim sigur ca tabla nu are formatii (dupa resolve_all_cascades)
+
+
+    def to_rows(self):
+        # Copie a tablei ca lista de randuri (pentru afisare, teste, comparatii);
+        # modificarile copiei nu ajung in tabla (scrierile se fac cu set_cell / swap)
+        f, cols = self.flat, self.cols
+        return [list(f[start:start + cols]) for start in self.layout.row_start]
+
+
+    @property
+    def grid(self):
+        # Doar pentru citire: copie imutabila (tuplu de randuri), construita la
+        # fiecare acces - board.grid[r][c] = v da eroare in loc sa nu faca nimic.
+        # Pentru o celula folositi cell(r, c), pentru toata tabla o singura to_rows()
+        return tuple(map(tuple, self.to_rows()))
+
 
     def copy(self):
         # Creeaza o copie completa a tablei
-        return Board(self.rows, self.cols, grid=deepcopy(self.grid))
+        # (fara constructor: nu recalculam hash-ul si nu cream alt RNG)
+        b = Board.__new__(Board)
+        b.rows, b.cols = self.rows, self.cols
+        b.layout = self.layout
+        b.flat = self.flat[:]
+        # Un singur memcpy
+        b.rng = self.rng
+        b.dirty_cols = None
+        b.zobrist = self.zobrist
+        b.hash = self.hash
+        b.select = self.select
+        b.journal = None
+        b.move_index = None
+        b.touched = {}
+        b.stable = self.stable
+        # Indexul se reconstruieste la nevoie (copiile din simulari nu il folosesc)
+        return b
+
+
+    def compute_hash(self):
+        # Calculeaza de la zero hash-ul Zobrist al tablei
+
+        h = 0
+        f, z = self.flat, self.layout.zobrist
+
+        for p in self.layout.pos:
+            h ^= z[p][f[p]]
+
+        return h
 
 
     def in_bounds(self, r, c):
@@ -77,12 +474,74 @@ class Board:
 
     def cell(self, r, c):
         # Returneaza valoarea dintr-o celula
-        return self.grid[r][c]
+        return self.flat[self.layout.row_start[r] + c]
+
+
+    def mark(self):
+        # Porneste jurnalul de scrieri si intoarce un punct de revenire;
+        # undo(punct) readuce tabla exact in starea de acum, fara copii.
+        # Punctele se pot imbrica (cautarea in adancime face mark/undo pe fiecare nivel)
+
+        if self.journal is None:
+            self.journal = []
+
+        return len(self.journal), self.hash, self.stable
+
+
+    def undo(self, point):
+        # Anuleaza toate scrierile facute dupa mark() care a intors point
+
+        n, h, self.stable = point
+        journal = self.journal
+        f = self.flat
+
+        touched = self.touched
+        w = self.layout.stride
+
+        while len(journal) > n:
+            p, v = journal.pop()
+            f[p] = v
+            # Refacem scrierile in ordine inversa
+            r, c = divmod(p, w)
+            if touched.get(c - PAD, -1) < r - PAD:
+                touched[c - PAD] = r - PAD
+
+        self.hash = h
+        self.dirty_cols = None
+
+        if n == 0:
+            self.journal = None
+
+
+    def snapshot(self):
+        # Starea curenta a tablei, de refacut pe alta tabla de aceeasi
+        # dimensiune cu restore() (un singur memcpy, fara jurnal)
+        return bytes(self.flat), self.hash, self.stable
+
+
+    def restore(self, state):
+        # Aduce tabla (de obicei o copie proaspata) in starea din snapshot()
+
+        flat, self.hash, self.stable = state
+        self.flat[:] = flat
+        self.move_index = None
+        self.touched = {}
+        self.dirty_cols = None
+        # Indexul de mutari se reconstruieste la nevoie
+            # Am revenit la primul mark: oprim jurnalul (fara cost in joc)
 
 
     def set_cell(self, r, c, v):
         # Seteaza o valoare intr-o celula
-        self.grid[r][c] = v
+        p = self.layout.row_start[r] + c
+        keys = self.layout.zobrist[p]
+        self.hash ^= keys[self.flat[p]] ^ keys[v]
+        if self.journal is not None:
+            self.journal.append((p, self.flat[p]))
+        if self.touched.get(c, -1) < r:
+            self.touched[c] = r
+        self.stable = False
+        self.flat[p] = v
 
 
     def swap(self, a, b):
@@ -90,168 +549,272 @@ class Board:
         (r1, c1), (r2, c2) = a, b
         # Despachetam coordonatele
 
-        self.grid[r1][c1], self.grid[r2][c2] = self.grid[r2][c2], self.grid[r1][c1]
+        f, layout = self.flat, self.layout
+        p1, p2 = layout.row_start[r1] + c1, layout.row_start[r2] + c2
+        v1, v2 = f[p1], f[p2]
+        k1, k2 = layout.zobrist[p1], layout.zobrist[p2]
+        self.hash ^= k1[v1] ^ k1[v2] ^ k2[v2] ^ k2[v1]
+        # Actualizam hash-ul doar pentru cele doua celule
+
+        if self.journal is not None:
+            self.journal += ((p1, v1), (p2, v2))
+            # Pastram valorile vechi pentru undo()
+
+        touched = self.touched
+        if touched.get(c1, -1) < r1:
+            touched[c1] = r1
+        if touched.get(c2, -1) < r2:
+            touched[c2] = r2
+        # Celulele de revalidat in indexul de mutari
+        self.stable = False
+
+        f[p1], f[p2] = v2, v1
         # Schimbam valorile dintre ele
 
 
-    def detect_formations(self):
+    def _creates_line_at(self, p):
+        # Verifica daca celula cu indicele plat p face parte dintr-o linie de minim 3
+        # pe orizontala sau pe verticala (orice formatie contine o astfel de linie).
+        # Bordura opreste singura numararea
+
+        f = self.flat
+        v = f[p]
+
+        if v == 0:
+            return False
+
+        run = 1
+        q = p - 1
+        while f[q] == v:
+            run += 1
+            q -= 1
+        q = p + 1
+        while f[q] == v:
+            run += 1
+            q += 1
+
+        if run >= 3:
+            return True
+
+        w = self.layout.stride
+        run = 1
+        q = p - w
+        while f[q] == v:
+            run += 1
+            q -= w
+        q = p + w
+        while f[q] == v:
+            run += 1
+            q += w
+
+        return run >= 3
+
+
+    def swap_creates_formation(self, a, b):
+        """
+        Verifica, fara copii ale tablei, daca swap-ul a <-> b formeaza ceva.
+        Swap-ul se aplica pe loc, se verifica doar randurile si coloanele
+        celor doua celule, apoi se anuleaza.
+        Presupune ca tabla era stabila (fara formatii) inainte de swap.
+        """
+
+        f, row_start = self.flat, self.layout.row_start
+        (r1, c1), (r2, c2) = a, b
+        p1, p2 = row_start[r1] + c1, row_start[r2] + c2
+        v1, v2 = f[p1], f[p2]
+
+        if v1 == v2:
+            # Doua bomboane identice nu schimba nimic
+            return False
+
+        f[p1], f[p2] = v2, v1
+        # Aplicam swap-ul pe loc (direct in grid: il anulam imediat,
+        # deci nu atingem hash-ul)
+
+        found = self._creates_line_at(p1) or self._creates_line_at(p2)
+        # Doar liniile care trec prin celulele mutate s-au putut schimba
+
+        f[p1], f[p2] = v1, v2
+        # Anulam swap-ul
+
+        return found
+
+
+    def _dirty_region(self, dirty):
+        """
+        Transforma coloanele modificate {col: cel mai jos rand schimbat} in
+        zona de cautare, proportionala cu zona schimbata (nu cu tabla):
+        - row_cols: (rand, coloanele de cautat pe acel rand), rand cu rand -
+          fereastra dc-2..dc+2 a fiecarei coloane schimbate dc
+        - col_bottoms: (coloana, ultimul rand de start cautat), coloana cu coloana
+        - anchors: ancorele L/T aflate la cel mult 2 celule de o celula schimbata
+        """
+
+        cols = self.cols
+        changed = sorted(dirty)
+        # Coloanele in care au fost eliminari
+
+        row_cols = []
+        for r in range(max(dirty.values()) + 1):
+            scan = set()
+            for dc in changed:
+                if dirty[dc] >= r:
+                    scan.update(range(max(0, dc - 2), min(cols, dc + 3)))
+            row_cols.append((r, sorted(scan)))
+        # Pe randul r, coloana dc s-a schimbat daca dirty[dc] >= r; fereastra
+        # prinde si restul unei linii mai lungi taiate de eliminare, care
+        # incepe langa celula eliminata dar nu contine nicio celula schimbata
+
+        col_bottoms = [(c, min(self.rows - 1, dirty[c] + 1)) for c in changed]
+        # Pe coloana, secventele care incep pana imediat sub zona schimbata
+        # (acolo poate incepe restul unei linii verticale taiate)
+
+        reach = {}
+        # reach[c] = ultimul rand in care o forma ancorata in coloana c
+        # poate atinge o celula schimbata (formele se intind pe 2 celule)
+
+        for dc, bottom in dirty.items():
+            for c in range(max(0, dc - 2), min(self.cols, dc + 3)):
+                reach[c] = max(reach.get(c, -1), min(self.rows - 1, bottom + 2))
+
+        window = sorted(reach)
+        row_start = self.layout.row_start
+        anchors = [(r * cols + c, row_start[r] + c) for r in range(max(reach.values()) + 1)
+                   for c in window if r <= reach[c]]
+        # Ancorele (indice compact, indice plat), doar din ferestrele coloanelor
+        # schimbate, in aceeasi ordine rand-major ca scanarea completa
+
+        return row_cols, col_bottoms, anchors
+
+
+    def detect_formations(self, dirty=None):
         # Detecteaza toate formatiile existente pe tabla
         # Returneaza o lista de obiecte Formation (pot fi suprapuse)
+        #
+        # dirty (optional) = {col: cel mai jos rand schimbat}, de obicei
+        # self.dirty_cols dupa apply_gravity_and_refill. Atunci se cauta
+        # doar secventele si formele care ating o celula schimbata sau
+        # vecina unei eliminari (restul unei linii lungi taiate). Rezultatul
+        # (inclusiv ordinea) este identic cu scanarea completa daca inainte de
+        # schimbare fiecare formatie de pe tabla continea o celula eliminata -
+        # ceea ce resolve_all_cascades garanteaza, deoarece selectia greedy
+        # atinge toate formatiile.
 
         forms = []
         # Lista in care salvam toate formatiile gasite
 
+        f = self.flat
+        layout = self.layout
+        rows, cols, w = self.rows, self.cols, layout.stride
+        row_start = layout.row_start
+        column_bits = column_run_masks(rows, cols)
+
+        if dirty is None:
+            every = range(cols)
+            row_cols = [(r, every) for r in range(rows)]
+            col_bottoms = [(c, rows - 1) for c in every]
+            anchors = layout.anchors
+        elif not dirty:
+            # Nimic nu s-a schimbat, deci nu pot aparea formatii noi
+            return forms
+        else:
+            row_cols, col_bottoms, anchors = self._dirty_region(dirty)
+
         # ================= LINII ORIZONTALE =================
-        for r in range(self.rows):
-            c = 0
-            # Incepem de la prima coloana
+        # Pentru fiecare celula de cautat pe rand, secventa care o contine:
+        # mergem la stanga pana la inceputul ei si la dreapta pana la capat
+        # (bordura opreste ambele bucle). Celulele deja acoperite de secventa
+        # precedenta sunt sarite, deci fiecare secventa apare o singura data,
+        # in ordinea inceputurilor, ca la scanarea completa
+        for r, scan in row_cols:
+            base = row_start[r]
+            end = -1
+            # Ultima coloana a secventei precedente
+
+            for c in scan:
+                if c <= end:
+                    continue
 
-            while c < self.cols:
-                val = self.grid[r][c]
+                val = f[base + c]
                 # Valoarea curenta
 
                 if val == 0:
                     # Daca celula este goala, sarim peste
-                    c += 1
                     continue
 
                 start = c
-                # Memorăm inceputul secventei
+                while f[base + start - 1] == val:
+                    start -= 1
+                # Inceputul secventei
 
-                while c + 1 < self.cols and self.grid[r][c + 1] == val:
-                    # Avansam cat timp bomboanele sunt identice
-                    c += 1
+                end = c
+                while f[base + end + 1] == val:
+                    end += 1
+                # Sfarsitul secventei
 
-                length = c - start + 1
+                length = end - start + 1
                 # Lungimea secventei gasite
 
                 if length >= 3:
                     # Daca avem minim 3 la rand
-                    if length == 3:
-                        cells = {(r, cc) for cc in range(start, start + 3)}
-                        forms.append(Formation(cells, SCORES['LINE3'], 'LINE3'))
-                    elif length == 4:
-                        cells = {(r, cc) for cc in range(start, start + 4)}
-                        forms.append(Formation(cells, SCORES['LINE4'], 'LINE4'))
-                    else:
-                        cells = {(r, cc) for cc in range(start, start + length)}
-                        forms.append(Formation(cells, SCORES['LINE5'], 'LINE5'))
-
-                c += 1
-                # Continuam cautarea dupa secventa
+                    kind = 'LINE3' if length == 3 else 'LINE4' if length == 4 else 'LINE5'
+                    mask = ((1 << length) - 1) << (r * cols + start)
+                    # Bitii consecutivi ai secventei
+                    forms.append(Formation(mask, SCORES[kind], kind, length, cols))
 
 
         # ================= LINII VERTICALE =================
-        for c in range(self.cols):
+        # Pe fiecare coloana, doar secventele care incep pana la randul dat
+        # (cele de mai jos nu s-au schimbat si nu ating nicio eliminare)
+        for c, bottom in col_bottoms:
+            p = row_start[0] + c
             r = 0
             # Pornim de sus in jos
 
-            while r < self.rows:
-                val = self.grid[r][c]
+            while r <= bottom:
+                val = f[p]
 
                 if val == 0:
                     r += 1
+                    p += w
                     continue
 
                 start = r
 
-                while r + 1 < self.rows and self.grid[r + 1][c] == val:
+                while f[p + w] == val:
                     r += 1
+                    p += w
 
                 length = r - start + 1
 
                 if length >= 3:
-                    if length == 3:
-                        cells = {(rr, c) for rr in range(start, start + 3)}
-                        forms.append(Formation(cells, SCORES['LINE3'], 'LINE3'))
-                    elif length == 4:
-                        cells = {(rr, c) for rr in range(start, start + 4)}
-                        forms.append(Formation(cells, SCORES['LINE4'], 'LINE4'))
-                    else:
-                        cells = {(rr, c) for rr in range(start, start + length)}
-                        forms.append(Formation(cells, SCORES['LINE5'], 'LINE5'))
+                    kind = 'LINE3' if length == 3 else 'LINE4' if length == 4 else 'LINE5'
+                    mask = column_bits[length] << (start * cols + c)
+                    # Cate un bit la fiecare cols pozitii
+                    forms.append(Formation(mask, SCORES[kind], kind, length, cols))
 
                 r += 1
+                p += w
 
 
-        # ================= FORME DE L =================
-        for r in range(self.rows):
-            for c in range(self.cols):
-                v = self.grid[r][c]
-
-                if v == 0:
-                    continue
-
-                # L spre dreapta jos
-                if self._match_cells_color([(r, c + i) for i in range(3)] + [(r + i, c) for i in range(3)], v):
-                    cells = {(r, c + i) for i in range(3)} | {(r + i, c) for i in range(3)}
-                    forms.append(Formation(cells, SCORES['L33'], 'L33'))
-
-                # L spre stanga jos
-                if self._match_cells_color([(r, c - i) for i in range(3)] + [(r + i, c) for i in range(3)], v):
-                    cells = {(r, c - i) for i in range(3)} | {(r + i, c) for i in range(3)}
-                    forms.append(Formation(cells, SCORES['L33'], 'L33'))
-
-                # L spre dreapta sus
-                if self._match_cells_color([(r, c + i) for i in range(3)] + [(r - i, c) for i in range(3)], v):
-                    cells = {(r, c + i) for i in range(3)} | {(r - i, c) for i in range(3)}
-                    forms.append(Formation(cells, SCORES['L33'], 'L33'))
+        # ================= FORME DE L si T =================
+        # Toate formele de L, apoi toate formele de T, fiecare in ordinea
+        # ancorelor; deplasarile si mastile vin din tabelele precalculate
+        for kind in ('L33', 'T333'):
+            score = SCORES[kind]
+            table = layout.shapes[kind]
 
-                # L spre stanga sus
-                if self._match_cells_color([(r, c - i) for i in range(3)] + [(r - i, c) for i in range(3)], v):
-                    cells = {(r, c - i) for i in range(3)} | {(r - i, c) for i in range(3)}
-                    forms.append(Formation(cells, SCORES['L33'], 'L33'))
-
-
-        # ================= FORME DE T =================
-        for r in range(self.rows):
-            for c in range(self.cols):
-                v = self.grid[r][c]
+            for i, p in anchors:
+                v = f[p]
 
                 if v == 0:
                     continue
 
-                # T cu tija in jos
-                if self.in_bounds(r + 2, c) and self.in_bounds(r + 1, c - 1) and self.in_bounds(r + 1, c + 1):
-                    coords = [(r + i, c) for i in range(3)] + [(r + 1, c - 1), (r + 1, c + 1)]
-                    if self._match_cells_color(coords, v):
-                        forms.append(Formation(set(coords), SCORES['T333'], 'T333'))
-
-                # T cu tija in sus
-                if self.in_bounds(r - 2, c) and self.in_bounds(r - 1, c - 1) and self.in_bounds(r - 1, c + 1):
-                    coords = [(r - i, c) for i in range(3)] + [(r - 1, c - 1), (r - 1, c + 1)]
-                    if self._match_cells_color(coords, v):
-                        forms.append(Formation(set(coords), SCORES['T333'], 'T333'))
-
-                # T orizontal spre dreapta
-                if self.in_bounds(r, c + 2) and self.in_bounds(r - 1, c + 1) and self.in_bounds(r + 1, c + 1):
-                    coords = [(r, c + i) for i in range(3)] + [(r - 1, c + 1), (r + 1, c + 1)]
-                    if self._match_cells_color(coords, v):
-                        forms.append(Formation(set(coords), SCORES['T333'], 'T333'))
-
-                # T orizontal spre stanga
-                if self.in_bounds(r, c - 2) and self.in_bounds(r - 1, c - 1) and self.in_bounds(r + 1, c - 1):
-                    coords = [(r, c - i) for i in range(3)] + [(r - 1, c - 1), (r + 1, c - 1)]
-                    if self._match_cells_color(coords, v):
-                        forms.append(Formation(set(coords), SCORES['T333'], 'T333'))
+                for (o1, o2, o3, o4), mask, low in table:
+                    if f[p + o1] == v and f[p + o2] == v and f[p + o3] == v and f[p + o4] == v:
+                        forms.append(Formation(mask << (i + low), score, kind, 5, cols))
 
         return forms
-    def _match_cells_color(self, coords, color):
-        # Verifica daca toate coordonatele din lista au aceeasi culoare
-
-        for (r, c) in coords:
-            # Parcurgem fiecare coordonata
-
-            if not self.in_bounds(r, c):
-                # Daca macar una este in afara tablei
-                return False
-
-            if self.grid[r][c] != color:
-                # Daca culoarea nu este cea cautata
-                return False
-
-        return True
-        # Daca toate verificarile au trecut
 
 
     def apply_eliminations(self, formations):
@@ -264,15 +827,28 @@ class Board:
         removed = 0
         # Contor pentru cate celule au fost eliminate
 
+        cols = self.cols
+        flat, pos, z = self.flat, self.layout.pos, self.layout.zobrist
+        self.stable = False
+
         for f in formations:
             # Parcurgem fiecare formatie
 
-            for (r, c) in f.cells:
+            for i in mask_indices(f.mask):
                 # Parcurgem fiecare celula din formatie
+                p = pos[i]
+                v = flat[p]
 
-                if self.grid[r][c] != 0:
+                if v != 0:
                     # Daca nu a fost deja eliminata
-                    self.grid[r][c] = 0
+                    keys = z[p]
+                    self.hash ^= keys[v] ^ keys[0]
+                    if self.journal is not None:
+                        self.journal.append((p, v))
+                    r, c = divmod(i, cols)
+                    if self.touched.get(c, -1) < r:
+                        self.touched[c] = r
+                    flat[p] = 0
                     # Eliminam celula
                     removed += 1
                     # Incrementam contorul
@@ -284,33 +860,81 @@ class Board:
     def apply_gravity_and_refill(self, rng=None):
         # Aplica gravitatia si reumple tabla cu bomboane noi
 
+        # Seteaza self.dirty_cols = {col: cel mai jos rand schimbat},
+        # folosit de detect_formations pentru rescanare locala
+
         if rng is None:
             rng = random
             # Daca nu primim RNG, folosim random global
 
+        dirty = {}
+        # Coloanele in care s-a schimbat ceva
+
+        f = self.flat
+        layout = self.layout
+        z = layout.zobrist
+        w = layout.stride
+        bottom = layout.row_start[self.rows - 1]
+        h = self.hash
+        journal = self.journal
+
+        rows = self.rows
+        top = layout.row_start[0]
+
         for c in range(self.cols):
             # Procesam fiecare coloana separat
 
-            write_r = self.rows - 1
+            column = f[top + c:bottom + c + 1:w]
+            # Coloana ca bytes, de sus in jos (o singura felie cu pas)
+
+            if 0 not in column:
+                # Coloana fara goluri: nimic de mutat
+                continue
+
+            lowest_hole = rows - 1 - column[::-1].index(0)
+            # Cel mai jos rand gol; sub el nu se misca nimic
+            dirty[c] = lowest_hole
+
+            write_p = top + c + lowest_hole * w
             # Pozitia unde va cadea urmatoarea bomboana
 
-            for r in range(self.rows - 1, -1, -1):
-                # Parcurgem coloana de jos in sus
+            for p in range(write_p - w, top + c - 1, -w):
+                # Parcurgem restul coloanei de jos in sus
 
-                if self.grid[r][c] != 0:
-                    # Daca gasim o bomboana
-                    self.grid[write_r][c] = self.grid[r][c]
-                    # O mutam in jos
-                    write_r -= 1
+                v = f[p]
+
+                if v != 0:
+                    # Daca gasim o bomboana, o mutam in jos
+                    keys = z[write_p]
+                    h ^= keys[f[write_p]] ^ keys[v]
+                    if journal is not None:
+                        journal.append((write_p, f[write_p]))
+                    f[write_p] = v
+                    write_p -= w
                     # Mutam pozitia de scriere in sus
 
-            for r in range(write_r, -1, -1):
+            for write_p in range(write_p, top + c - 1, -w):
                 # Umplem restul coloanei cu bomboane noi
-                self.grid[r][c] = rng.randint(1, 4)
+                v = rng.randint(1, 4)
                 # Generam bomboane random
+                keys = z[write_p]
+                h ^= keys[f[write_p]] ^ keys[v]
+                if journal is not None:
+                    journal.append((write_p, f[write_p]))
+                f[write_p] = v
+
+        self.hash = h
+        self.dirty_cols = dirty
 
+        touched = self.touched
+        for c, r in dirty.items():
+            if touched.get(c, -1) < r:
+                touched[c] = r
+        # Gravitatia si refill-ul schimba doar randurile 0..dirty[c] din fiecare coloana
+        self.stable = False
 
-    def resolve_all_cascades(self, rng=None):
+
+    def resolve_all_cascades(self, rng=None, trace=None):
         """
         Repeta:
         - detectare formatii
@@ -319,24 +943,33 @@ class Board:
         - gravitatie + refill
         pana cand tabla este stabila.
         Returneaza scorul total si numarul de cascade.
+        Daca rng este un RefillStream, fiecare cascada primeste sub-fluxul ei.
+        Cu trace (TraceRecorder), formatiile selectate din fiecare cascada
+        sunt inregistrate dupa refill.
         """
 
+        stream = rng if isinstance(rng, RefillStream) else None
+
         total_score = 0
         # Scor acumulat
 
         total_cascades = 0
         # Numar total de cascade
 
+        dirty = None
+        # La primul pas scanam toata tabla, apoi doar coloanele schimbate
+
         while True:
-            forms = self.detect_formations()
-            # Detectam toate formatiile existente
+            forms = self.detect_formations(dirty)
+            # Detectam formatiile (toate, sau doar cele din zona schimbata)
 
             if not forms:
                 # Daca nu mai exista formatii
+                self.stable = True
                 break
 
-            selected = select_non_overlapping(forms)
-            # Alegem doar formatiile fara suprapuneri
+            selected = self.select(forms)
+            # Alegem doar formatiile fara suprapuneri (vezi SELECTIONS)
 
             if not selected:
                 # Daca nu se poate selecta nimic
@@ -349,9 +982,14 @@ class Board:
             self.apply_eliminations(selected)
             # Eliminam formatiile
 
-            self.apply_gravity_and_refill(rng=rng)
+            self.apply_gravity_and_refill(rng=stream.child(total_cascades) if stream else rng)
             # Aplicam gravitatia si refill
 
+            if trace is not None:
+                trace.cascade(selected)
+
+            dirty = self.dirty_cols
+
             total_cascades += 1
             # Incrementam numarul de cascade
 
@@ -363,42 +1001,61 @@ class Board:
         """
         Verifica daca exista macar un swap valid
         care produce o formatie.
+        O singura trecere O(rows*cols) cu sabloanele din MOVE_PATTERNS,
+        fara copii si fara swap-uri; presupune tabla stabila (dupa cascade).
         """
 
-        for r in range(self.rows):
-            for c in range(self.cols):
-                for dr, dc in ((1, 0), (0, 1)):
-                    # Verificam doar dreapta si jos
+        f = self.flat
+        moves = self.layout.moves
 
-                    r2, c2 = r + dr, c + dc
+        for p in self.layout.pos:
+            v = f[p]
+
+            for o1, o2 in moves:
+                if f[p + o1] == v and f[p + o2] == v:
+                    # Bordura nu este egala cu nicio bomboana
+                    return True
+
+        return False
+        # Nu exista mutari valide
 
-                    if not self.in_bounds(r2, c2):
-                        continue
 
-                    b = self.copy()
-                    # Lucram pe o copie
+    def reshuffle(self, rng=None, attempts=100):
+        # Amesteca bomboanele existente (ca in jocul real) pana cand tabla nu are
+        # formatii si are macar o mutare; intoarce False daca nu reuseste
+        # in attempts incercari (de ex. prea putine culori pe tabla), cu tabla
+        # lasata cum era inainte (un trace nu inregistreaza amestecarile esuate)
 
-                    b.swap((r, c), (r2, c2))
-                    # Aplicam swap
+        if rng is None:
+            rng = random
+
+        original = [self.cell(r, c) for r in range(self.rows) for c in range(self.cols)]
+        values = list(original)
+
+        for _ in range(attempts):
+            rng.shuffle(values)
 
-                    if b.detect_formations():
-                        # Daca apare o formatie
-                        return True
+            for i, v in enumerate(values):
+                r, c = divmod(i, self.cols)
+                self.set_cell(r, c, v)
+                # set_cell tine la zi hash-ul si indexul de mutari
+
+            if not self.detect_formations() and self.any_possible_swap_creates_formation():
+                self.stable = True
+                return True
+
+        for i, v in enumerate(original):
+            r, c = divmod(i, self.cols)
+            self.set_cell(r, c, v)
 
         return False
-        # Nu exista mutari valide
 
 
-    def find_best_swap(self):
-        """
-        Cauta cel mai bun swap posibil:
-        - simuleaza fiecare swap
-        - rezolva cascadele
-        - alege swap-ul cu scor maxim
-        """
+    def adjacent_swaps(self):
+        # Toate swap-urile intre celule vecine, in ordinea de scanare
+        # (rand, coloana, apoi jos inainte de dreapta)
 
-        best = None
-        # Variabila pentru cel mai bun swap
+        swaps = []
 
         for r in range(self.rows):
             for c in range(self.cols):
@@ -406,94 +1063,1907 @@ class Board:
 
                     r2, c2 = r + dr, c + dc
 
-                    if not self.in_bounds(r2, c2):
-                        continue
+                    if self.in_bounds(r2, c2):
+                        swaps.append(((r, c), (r2, c2)))
 
-                    b = self.copy()
-                    # Copiem tabla
+        return swaps
 
-                    b.swap((r, c), (r2, c2))
-                    # Aplicam swap
 
-                    gained, casc = b.resolve_all_cascades()
-                    # Simulam cascadele
+    def candidate_swaps(self):
+        # Swap-urile care pot aduce puncte, in ordinea de scanare
 
-                    if gained > 0:
-                        # Daca mutarea produce puncte
-                        key = (gained, -casc, -r, -c, -r2, -c2)
-                        # Criteriu de comparare
+        if not self.stable:
+            if self.detect_formations():
+                # Pe o tabla instabila orice swap poate aduce puncte
+                return self.adjacent_swaps()
+            self.stable = True
 
-                        if best is None or key > best[0]:
-                            best = (key, (r, c), (r2, c2), gained, casc)
+        return sorted(self._update_move_index(), key=lambda s: (s[0], s[1][1]))
+        # Pe o tabla stabila un swap care nu formeaza nimic local are scor 0,
+        # deci il respingem fara copie si fara simularea cascadelor.
+        # Cheia (a, coloana lui b) pune swap-ul in jos inaintea celui la dreapta
 
-        if best is None:
-            return None
 
-        return best[1], best[2], best[3], best[4]
+    def _update_move_index(self):
+        """
+        Intoarce indexul swap-urilor care formeaza ceva (tabla stabila).
+        Prima data il construim verificand toate swap-urile; apoi, dupa fiecare
+        mutare, reverificam doar swap-urile din jurul celulelor scrise (self.touched).
+        Un swap depinde doar de celulele aflate la cel mult 2 pozitii pe randul
+        si coloana celor doua celule, deci ajunge zona coloanelor c-2..c+2,
+        randurile 0..r+2, pentru fiecare coloana scrisa c cu cel mai jos rand r.
+        """
 
+        index = self.move_index
+        touched = self.touched
 
-def select_non_overlapping(forms):
-    """
-    Selecteaza greedy formatiile:
-    - sortate descrescator dupa scor
-    - fara suprapuneri de celule
-    """
+        if index is None:
+            index = {(a, b) for a, b in self.adjacent_swaps() if self.swap_creates_formation(a, b)}
+            self.move_index = index
+            self.touched = {}
+            return index
 
-    forms_sorted = sorted(forms, key=lambda f: (-f.score, -len(f.cells)))
-    # Sortam dupa scor si marime
+        if not touched:
+            return index
 
-    chosen = []
-    # Lista de formatii alese
+        rows, cols = self.rows, self.cols
+        low = [-1] * cols
+        # low[c] = ultimul rand de reverificat in coloana c
 
-    used = set()
-    # Celule deja folosite
+        for c, r in touched.items():
+            r = min(r + 2, rows - 1)
+            for cc in range(max(0, c - 2), min(cols, c + 3)):
+                if low[cc] < r:
+                    low[cc] = r
 
-    for f in forms_sorted:
-        if f.cells & used:
-            continue
-        chosen.append(f)
-        used |= f.cells
+        check = set()
 
-    return chosen
+        for c in range(cols):
+            for r in range(low[c] + 1):
+                if r + 1 < rows:
+                    check.add(((r, c), (r + 1, c)))
+                if c + 1 < cols:
+                    check.add(((r, c), (r, c + 1)))
+                if r > 0:
+                    check.add(((r - 1, c), (r, c)))
+                if c > 0:
+                    check.add(((r, c - 1), (r, c)))
+                # Cele (cel mult) 4 swap-uri care ating celula (r, c)
 
+        for a, b in check:
+            if self.swap_creates_formation(a, b):
+                index.add((a, b))
+            else:
+                index.discard((a, b))
 
-def play_single_game(rows=11, cols=11, target=10000, seed=None, rng=None):
-    # Ruleaza un singur joc complet
+        self.touched = {}
 
-    if rng is None:
-        rng = random.Random(seed)
+        return index
 
-    board = Board(rows, cols, seed=None)
-    # Initializam tabla
 
-    refill_rng = random.Random(seed)
-    # RNG separat pentru refill
+    def immediate_score(self, a, b):
+        # Scorul imediat al unui swap: suma formatiilor de pe primul nivel,
+        # inainte de selectia fara suprapuneri si fara cascade (estimare ieftina)
 
-    initial_score, initial_casc = board.resolve_all_cascades(rng=refill_rng)
-    # Eliminam formatiile initiale
+        stable = self.stable
+        self.swap(a, b)
+        score = sum(f.score for f in self.detect_formations())
+        self.swap(a, b)
+        self.stable = stable
+        # Tabla a revenit la starea de dinainte (inclusiv indicatorul stable)
 
-    total_score = initial_score
-    total_swaps = 0
-    total_cascades = initial_casc
-    moves_to_10000 = None
+        return score
 
-    while True:
-        if total_score >= target and moves_to_10000 is None:
-            moves_to_10000 = total_swaps
 
-        best = board.find_best_swap()
-        # Cautam cea mai buna mutare
+    def _top_k(self, candidates, scores, top_k):
+        # Pastreaza cei mai buni top_k candidati dupa scorul imediat
+        # (la egalitate, primii in ordinea de scanare), in ordinea de scanare
 
-        if best is None:
-            # Daca nu mai exista mutari
-            return {
-                'points': total_score,
+        order = sorted(range(len(candidates)), key=lambda i: (-scores[i], i))[:top_k]
+
+        return [candidates[i] for i in sorted(order)]
+
+
+    def simulate_swap(self, a, b, stream=None):
+        # Simuleaza complet swap-ul a <-> b pe o copie: (scor, cascade).
+        # Cu stream (RefillStream), refill-ul vine din sub-fluxul swap-ului,
+        # deci rezultatul este o functie pura de (tabla, swap, stream) si poate
+        # fi calculat in alt proces. Fara stream, refill-ul foloseste random
+        # global (ca inainte). Memorarea simularilor (TranspositionTable) este
+        # doar in SearchPlayer, singurul care reevalueaza aceleasi pozitii
+
+        sim = self.copy()
+        sim.swap(a, b)
+
+        if stream is None:
+            return sim.resolve_all_cascades()
+
+        (r, c), (r2, c2) = a, b
+        return sim.resolve_all_cascades(rng=stream.child(r, c, r2, c2))
+
+
+    def _best_of(self, candidates, stream=None):
+        # Simuleaza complet (swap + cascade) fiecare candidat pe o copie
+        # si intoarce cel mai bun, ca (a, b, scor, cascade) sau None
+
+        best = None
+        # Variabila pentru cel mai bun swap
+
+        for (r, c), (r2, c2) in candidates:
+            gained, casc = self.simulate_swap((r, c), (r2, c2), stream)
+            # Simulam swap-ul si cascadele
+
+            if gained > 0:
+                # Daca mutarea produce puncte
+                key = (gained, -casc, -r, -c, -r2, -c2)
+                # Criteriu de comparare
+
+                if best is None or key > best[0]:
+                    best = (key, (r, c), (r2, c2), gained, casc)
+
+        if best is None:
+            return None
+
+        return best[1], best[2], best[3], best[4]
+
+
+    def find_best_swap(self, top_k=None, stream=None):
+        """
+        Cauta cel mai bun swap posibil:
+        - simuleaza fiecare swap
+        - rezolva cascadele
+        - alege swap-ul cu scor maxim
+        Cu top_k, doar cei mai buni top_k candidati dupa scorul imediat
+        sunt simulati complet (mai rapid, dar nu mai este exact).
+        Cu stream (RefillStream) refill-ul simularilor nu mai atinge random
+        global si nu depinde de ordinea evaluarii (vezi simulate_swap).
+        """
+
+        if top_k is not None and top_k < 1:
+            raise ValueError('top_k trebuie sa fie cel putin 1')
+
+        candidates = self.candidate_swaps()
+
+        if top_k is not None and len(candidates) > top_k:
+            scores = [self.immediate_score(a, b) for a, b in candidates]
+            candidates = self._top_k(candidates, scores, top_k)
+
+        return self._best_of(candidates, stream)
+
+
+class NumpyBoard(Board):
+    """
+    Varianta a tablei care tine grid-ul intr-un array NumPy uint8 (rows x cols).
+    Detectarea, eliminarea si gravitatia sunt vectorizate; restul metodelor
+    (cascade, cautarea swap-ului) sunt mostenite din Board.
+    Consuma RNG-ul exact ca Board, deci acelasi seed da acelasi scor.
+    """
+
+    grid = None
+    # Aici grid-ul este chiar array-ul (ascunde proprietatea din Board); scrierile
+    # trec tot prin set_cell / swap, care tin hash-ul la zi
+
+    def __init__(self, rows=11, cols=11, seed=None, grid=None):
+        if np is None:
+            raise ImportError('engine-ul numpy necesita pachetul numpy')
+
+        self.rows = rows
+        self.cols = cols
+
+        if grid is None:
+            grid = [[random.randint(1, 4) for _ in range(cols)] for _ in range(rows)]
+            # Generam exact ca Board, ca sa obtinem aceeasi tabla din acelasi seed
+
+        self.grid = np.array(grid, dtype=np.uint8)
+        # Matricea rows x cols (np.array copiaza datele)
+
+        self.rng = random.Random(seed)
+        self.dirty_cols = None
+
+        self.zobrist = zobrist_keys(rows, cols)
+        self.zkeys = np.array(self.zobrist, dtype=np.uint64)
+        # Aceleasi chei Zobrist ca Board, ca array (rows, cols, 5)
+        self.hash = self.compute_hash()
+
+        self.select = select_non_overlapping
+
+
+    def copy(self):
+        b = NumpyBoard.__new__(NumpyBoard)
+        b.rows, b.cols = self.rows, self.cols
+        b.grid = self.grid.copy()
+        b.rng = self.rng
+        b.dirty_cols = None
+        b.zobrist, b.zkeys, b.hash = self.zobrist, self.zkeys, self.hash
+        b.select = self.select
+        return b
+
+
+    def _zxor(self, rr, cc, values):
+        # XOR-ul cheilor Zobrist pentru celulele (rr, cc) cu valorile date
+        return int(np.bitwise_xor.reduce(self.zkeys[rr, cc, values], axis=None))
+
+
+    def compute_hash(self):
+        rr, cc = np.indices(self.grid.shape)
+        return self._zxor(rr, cc, self.grid)
+
+
+    def to_rows(self):
+        return self.grid.tolist()
+
+
+    def cell(self, r, c):
+        return int(self.grid[r, c])
+
+
+    def set_cell(self, r, c, v):
+        keys = self.zobrist[r][c]
+        self.hash ^= keys[int(self.grid[r, c])] ^ keys[v]
+        self.grid[r, c] = v
+
+
+    def swap(self, a, b):
+        g = self.grid
+        v1, v2 = int(g[a]), int(g[b])
+        k1, k2 = self.zobrist[a[0]][a[1]], self.zobrist[b[0]][b[1]]
+        self.hash ^= k1[v1] ^ k1[v2] ^ k2[v2] ^ k2[v1]
+        g[a], g[b] = v2, v1
+
+
+    def _runs(self, a):
+        # Gaseste secventele de minim 3 valori egale (nenule) pe fiecare rand
+        # din a. Intoarce (rand, inceput, lungime) in ordinea randurilor.
+
+        rows, cols = a.shape
+
+        p = np.zeros((rows, cols + 1), dtype=np.uint8)
+        p[:, :cols] = a
+        p = p.ravel()
+        # O coloana de 0 la final separa randurile, deci secventele nu trec
+        # de pe un rand pe altul
+
+        starts = np.flatnonzero(np.concatenate(([True], p[1:] != p[:-1])))
+        # Inceputul fiecarei secvente de valori egale
+
+        lengths = np.diff(np.append(starts, p.size))
+
+        keep = (lengths >= 3) & (p[starts] != 0)
+        starts = starts[keep]
+
+        return (starts // (cols + 1)).tolist(), (starts % (cols + 1)).tolist(), lengths[keep].tolist()
+
+
+    def _shape_anchors(self, shapes):
+        # Pentru fiecare forma, masca ancorelor (r, c) unde toate celulele formei
+        # au culoarea ancorei. Intoarce perechile (ancora, indice forma) sortate
+        # rand-major, apoi dupa forma, ca in scanarea din Board.
+
+        a = self.grid
+        rows, cols = a.shape
+
+        p = np.zeros((rows + 4, cols + 4), dtype=np.uint8)
+        p[2:-2, 2:-2] = a
+        # Bordura de 2 celule goale: in afara tablei nu se potriveste nimic
+
+        def shifted(dr, dc):
+            return p[2 + dr:2 + dr + rows, 2 + dc:2 + dc + cols]
+
+        same = {}
+        # Mastile "vecinul (dr, dc) are aceeasi culoare", refolosite intre forme
+
+        found = []
+
+        for k, shape in enumerate(shapes):
+            mask = a != 0
+
+            for off in shape[1:]:
+                if off not in same:
+                    same[off] = shifted(*off) == a
+                mask = mask & same[off]
+
+            idx = np.flatnonzero(mask)
+            found.append(idx * len(shapes) + k)
+
+        keys = np.sort(np.concatenate(found)).tolist()
+
+        return [divmod(key, len(shapes)) for key in keys]
+
+
+    def detect_formations(self, dirty=None):
+        # Aceeasi lista (si aceeasi ordine) ca Board.detect_formations,
+        # calculata cu masti vectorizate. Parametrul dirty este acceptat pentru
+        # compatibilitate; scanarea completa este deja ieftina aici.
+
+        forms = []
+        cols = self.cols
+
+        column_bits = column_run_masks(self.rows, cols)
+        tables = shape_tables(cols)
+
+        row_runs = self._runs(self.grid)
+        col_runs = self._runs(self.grid.T)
+
+        for r, c, length in zip(*row_runs):
+            kind = 'LINE3' if length == 3 else 'LINE4' if length == 4 else 'LINE5'
+            forms.append(Formation(((1 << length) - 1) << (r * cols + c), SCORES[kind], kind, length, cols))
+
+        for c, r, length in zip(*col_runs):
+            kind = 'LINE3' if length == 3 else 'LINE4' if length == 4 else 'LINE5'
+            forms.append(Formation(column_bits[length] << (r * cols + c), SCORES[kind], kind, length, cols))
+
+        if not row_runs[0] or not col_runs[0]:
+            return forms
+            # Orice L sau T contine o linie de 3 pe rand si una pe coloana; fara
+            # amandoua sarim cele 8 treceri pe forme (majoritatea detectarilor
+            # din cascade, inclusiv ultima, care nu gaseste nimic)
+
+        for kind, shapes in (('L33', L_SHAPES), ('T333', T_SHAPES)):
+            for anchor, k in self._shape_anchors(shapes):
+                _, mask, low = tables[kind][k]
+                forms.append(Formation(mask << (anchor + low), SCORES[kind], kind, 5, cols))
+
+        return forms
+
+
+    def batch_swap_scores(self, swaps, chunk_cells=2000000):
+        """
+        Scorul imediat (vezi Board.immediate_score) pentru toate swap-urile
+        din lista, calculat vectorizat: variantele tablei sunt stivuite intr-un
+        array (n_swaps, rows, cols) si formatiile de pe primul nivel sunt
+        numarate pentru toate odata. Swap-urile sunt procesate pe bucati de
+        cel mult chunk_cells celule ca sa limitam memoria pe table mari.
+        """
+
+        rows, cols = self.rows, self.cols
+        g = self.grid
+        out = np.zeros(len(swaps), dtype=np.int64)
+
+        if not swaps:
+            return out
+
+        pos = np.array([(r, c, r2, c2) for (r, c), (r2, c2) in swaps], dtype=np.intp)
+        step = max(1, chunk_cells // (rows * cols))
+
+        for lo in range(0, len(swaps), step):
+            r, c, r2, c2 = pos[lo:lo + step].T
+            n = len(r)
+            k = np.arange(n)
+
+            p = np.zeros((n, rows + 8, cols + 8), dtype=np.uint8)
+            p[:, 4:-4, 4:-4] = g
+            p[k, r + 4, c + 4] = g[r2, c2]
+            p[k, r2 + 4, c2 + 4] = g[r, c]
+            # Bordura de 4 celule goale: destul pentru o linie de 5 de la ancora
+
+            b = p[:, 4:-4, 4:-4]
+            nz = b != 0
+
+            def same(dr, dc):
+                return p[:, 4 + dr:4 + dr + rows, 4 + dc:4 + dc + cols] == b
+
+            total = np.zeros(n, dtype=np.int64)
+
+            for d in (1, 0), (0, 1):
+                # Linii: inceputul unei secvente de minim 3 si lungimea ei
+                dr, dc = d
+                start = nz & same(dr, dc) & same(2 * dr, 2 * dc) & ~same(-dr, -dc)
+                ge4 = start & same(3 * dr, 3 * dc)
+                ge5 = ge4 & same(4 * dr, 4 * dc)
+                total += SCORES['LINE3'] * (start & ~ge4).sum(axis=(1, 2))
+                total += SCORES['LINE4'] * (ge4 & ~ge5).sum(axis=(1, 2))
+                total += SCORES['LINE5'] * ge5.sum(axis=(1, 2))
+
+            for kind, shapes in (('L33', L_SHAPES), ('T333', T_SHAPES)):
+                for shape in shapes:
+                    mask = nz
+                    for off in shape[1:]:
+                        mask = mask & same(*off)
+                    total += SCORES[kind] * mask.sum(axis=(1, 2))
+
+            out[lo:lo + n] = total
+
+        return out
+
+
+    def mark(self):
+        # Pentru un array, copia grid-ului este un singur memcpy,
+        # deci punctul de revenire este chiar grid-ul (fara jurnal)
+        return self.grid.copy(), self.hash
+
+
+    def undo(self, point):
+        grid, self.hash = point
+        self.grid[...] = grid
+        self.dirty_cols = None
+
+
+    snapshot = mark
+    restore = undo
+    # Punctul de revenire este deja o copie completa a starii
+
+
+    def candidate_swaps(self, with_scores=False):
+        # Swap-urile cu scor imediat pozitiv, dintr-o singura evaluare vectorizata;
+        # cu with_scores intoarce si scorurile lor imediate (pentru find_best_swap,
+        # care trece astfel prin faza candidate_swaps a PhaseProfiler)
+
+        swaps = self.adjacent_swaps()
+        scores = self.batch_swap_scores(swaps)
+        live = np.flatnonzero(scores > 0).tolist()
+        candidates = [swaps[i] for i in live]
+
+        if with_scores:
+            return candidates, scores[live].tolist()
+
+        return candidates
+
+
+    def any_possible_swap_creates_formation(self):
+        # Aceleasi sabloane ca Board (MOVE_PATTERNS), evaluate pe toata tabla deodata
+
+        rows, cols = self.rows, self.cols
+        p = np.zeros((rows + 6, cols + 6), dtype=np.uint8)
+        p[3:-3, 3:-3] = self.grid
+        # Bordura de 3 celule goale: cel mai departat offset din sabloane
+        b = p[3:-3, 3:-3]
+
+        def at(dr, dc):
+            return p[3 + dr:3 + dr + rows, 3 + dc:3 + dc + cols]
+
+        for o1, o2 in MOVE_PATTERNS:
+            if ((b == at(*o1)) & (b == at(*o2)) & (b != 0)).any():
+                return True
+
+        return False
+
+
+    def find_best_swap(self, top_k=None, stream=None):
+        # Ca Board.find_best_swap, dar candidatii si scorurile lor imediate
+        # vin dintr-o singura evaluare vectorizata a tuturor swap-urilor;
+        # doar swap-urile care formeaza ceva sunt simulate complet
+
+        if top_k is not None and top_k < 1:
+            raise ValueError('top_k trebuie sa fie cel putin 1')
+
+        candidates, scores = self.candidate_swaps(with_scores=True)
+
+        if top_k is not None and len(candidates) > top_k:
+            candidates = self._top_k(candidates, scores, top_k)
+
+        return self._best_of(candidates, stream)
+
+
+    def apply_eliminations(self, formations):
+        union = 0
+        for f in formations:
+            union |= f.mask
+
+        if not union:
+            return 0
+
+        n = self.rows * self.cols
+        bits = np.unpackbits(np.frombuffer(union.to_bytes((n + 7) // 8, 'little'), dtype=np.uint8),
+                             bitorder='little')
+        flat = np.flatnonzero(bits[:n])
+        # Masca reunita -> indicii plati ai celulelor, fara bucle Python
+        g = self.grid.ravel()
+        # Vedere plata peste acelasi buffer
+
+        flat = flat[g[flat] != 0]
+        rr, cc = np.divmod(flat, self.cols)
+        self.hash ^= self._zxor(rr, cc, g[flat]) ^ self._zxor(rr, cc, 0)
+        g[flat] = 0
+
+        return len(flat)
+
+
+    def apply_gravity_and_refill(self, rng=None):
+        # Compactare pe coloane: argsort stabil pe masca "nenul" pune golurile
+        # sus si pastreaza ordinea bomboanelor. Refill-ul cere valorile de la
+        # rng in aceeasi ordine ca Board (coloana cu coloana, de jos in sus).
+
+        if rng is None:
+            rng = random
+
+        a = self.grid
+        rows = self.rows
+        empty = a == 0
+
+        holes = empty.sum(axis=0)
+        # Cate celule goale are fiecare coloana
+
+        lowest = rows - 1 - np.argmax(empty[::-1], axis=0)
+        # Cel mai jos rand gol din fiecare coloana (valid doar unde holes > 0)
+
+        changed = np.flatnonzero(holes)
+        self.dirty_cols = dict(zip(changed.tolist(), lowest[changed].tolist()))
+
+        if not changed.size:
+            return
+
+        before = a[:, changed].copy()
+        # Coloanele care se schimba, pentru actualizarea hash-ului
+
+        order = np.argsort(~empty, axis=0, kind='stable')
+        a[:] = np.take_along_axis(a, order, axis=0)
+
+        counts = holes[changed]
+        total = int(counts.sum())
+        values = [rng.randint(1, 4) for _ in range(total)]
+
+        col_idx = np.repeat(changed, counts)
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        row_idx = np.repeat(counts, counts) - 1 - within
+        # In fiecare coloana umplem de la ultimul gol spre randul 0
+
+        a[row_idx, col_idx] = values
+
+        after = a[:, changed]
+        rr, cc = np.nonzero(before != after)
+        self.hash ^= self._zxor(rr, changed[cc], before[rr, cc]) ^ self._zxor(rr, changed[cc], after[rr, cc])
+
+
+class BitLayout:
+    """
+    Tabelele pentru BitBoard: celula (r, c) este bitul r * stride + c, cu
+    stride = cols + 2. Cele doua coloane de padding (mereu 0) de la capatul
+    fiecarui rand opresc deplasarile orizontale de cel mult 3 pozitii, deci
+    o secventa nu trece niciodata pe randul urmator.
+    full = toate celulele; right / down = celulele care au vecin la dreapta /
+    dedesubt; columns[c] = celulele coloanei c; zobrist[i] = cheile bitului i;
+    nibbles[v][k][x] = XOR-ul cheilor valorii v pentru bitii x (4 biti) din
+    grupul k de 4 biti; shapes = deplasarile formelor L/T (fara ancora) si
+    mastile lor compacte.
+    """
+
+    __slots__ = ('rows', 'cols', 'stride', 'full', 'right', 'down', 'columns', 'zobrist', 'nbytes',
+                 'nibbles', 'shapes')
+
+    def __init__(self, rows, cols):
+        w = cols + 2
+        self.rows, self.cols, self.stride = rows, cols, w
+
+        row = (1 << cols) - 1
+        self.full = sum(row << (r * w) for r in range(rows))
+        self.right = sum((row >> 1) << (r * w) for r in range(rows))
+        self.down = sum(row << (r * w) for r in range(rows - 1))
+        self.columns = [sum(1 << (r * w + c) for r in range(rows)) for c in range(cols)]
+
+        keys = zobrist_keys(rows, cols)
+        self.nbytes = (rows * w + 7) // 8
+        self.zobrist = [None] * (8 * self.nbytes)
+        for r in range(rows):
+            for c in range(cols):
+                self.zobrist[r * w + c] = keys[r][c]
+
+        self.nibbles = []
+
+        for v in range(5):
+            groups = []
+
+            for k in range(0, len(self.zobrist), 4):
+                table = [0] * 16
+                for x in range(1, 16):
+                    low = x & -x
+                    cell = self.zobrist[k + low.bit_length() - 1]
+                    table[x] = table[x ^ low] ^ (cell[v] if cell else 0)
+                    # Fiecare intrare = intrarea fara bitul cel mai mic ^ cheia lui
+                groups.append(table)
+
+            self.nibbles.append(groups)
+
+        self.shapes = {
+            kind: [(tuple(dr * w + dc for dr, dc in shape[1:]), mask, low) for shape, mask, low in table]
+            for kind, table in shape_tables(cols).items()
+        }
+
+    def zxor(self, mask, v):
+        # XOR-ul cheilor Zobrist ale valorii v pentru toate celulele din mask,
+        # cate 4 biti odata (fara sa parcurgem bitii unul cate unul)
+
+        groups = self.nibbles[v]
+        h = 0
+
+        for k, x in enumerate(mask.to_bytes(self.nbytes, 'little')):
+            if x:
+                h ^= groups[2 * k][x & 15] ^ groups[2 * k + 1][x >> 4]
+
+        return h
+
+    def spread(self, mask):
+        # Masca compacta (indici r * cols + c, ca in Formation) -> masca pe biti cu padding
+
+        cols, w = self.cols, self.stride
+        row = (1 << cols) - 1
+        out = 0
+        r = 0
+
+        while mask:
+            out |= (mask & row) << (r * w)
+            mask >>= cols
+            r += 1
+
+        return out
+
+
+_BIT_LAYOUTS = {}
+# BitLayout deja construite, pe dimensiune de tabla
+
+
+def bit_layout(rows, cols):
+    layout = _BIT_LAYOUTS.get((rows, cols))
+
+    if layout is None:
+        layout = _BIT_LAYOUTS[(rows, cols)] = BitLayout(rows, cols)
+
+    return layout
+
+
+def shifted(b, offset):
+    # Bitul i al rezultatului este bitul i + offset din b
+    return b >> offset if offset > 0 else b << -offset
+
+
+class BitBoard(Board):
+    """
+    Varianta a tablei cu cate un intreg Python (bitboard) pentru fiecare culoare
+    1..4, fara NumPy (vezi BitLayout pentru asezarea bitilor).
+    Secventele de 3/4/5+ sunt lanturi de deplasari si AND-uri pe toata tabla,
+    formele L/T sunt AND-uri ale mastilor deplasate cu deplasarile formei,
+    gravitatia muta deodata toate bomboanele care au gol dedesubt.
+    Produce aceleasi formatii, in aceeasi ordine, si consuma RNG-ul exact ca
+    Board, deci acelasi seed da acelasi scor.
+    """
+
+    def __init__(self, rows=11, cols=11, seed=None, grid=None):
+        self.rows = rows
+        self.cols = cols
+
+        if grid is None:
+            grid = [[random.randint(1, 4) for _ in range(cols)] for _ in range(rows)]
+            # Generam exact ca Board, ca sa obtinem aceeasi tabla din acelasi seed
+
+        layout = bit_layout(rows, cols)
+        self.layout = layout
+        self.bits = [0, 0, 0, 0]
+        # bits[v - 1] = celulele cu bomboana v
+
+        for r, row in enumerate(grid):
+            for c, v in enumerate(row):
+                if v:
+                    self.bits[v - 1] |= 1 << (r * layout.stride + c)
+
+        self.rng = random.Random(seed)
+        self.dirty_cols = None
+
+        self.zobrist = zobrist_keys(rows, cols)
+        self.hash = self.compute_hash()
+
+        self.select = select_non_overlapping
+        self.stable = False
+
+
+    def to_rows(self):
+        # Copie a tablei ca lista de randuri (grid-ul se construieste din bitboard-uri)
+        return [[self.cell(r, c) for c in range(self.cols)] for r in range(self.rows)]
+
+
+    def copy(self):
+        b = BitBoard.__new__(BitBoard)
+        b.rows, b.cols = self.rows, self.cols
+        b.layout = self.layout
+        b.bits = self.bits[:]
+        # Intregii sunt imutabili: ajunge o copie a listei
+        b.rng = self.rng
+        b.dirty_cols = None
+        b.zobrist, b.hash = self.zobrist, self.hash
+        b.select = self.select
+        b.stable = self.stable
+        return b
+
+
+    def compute_hash(self):
+        h = 0
+
+        for r in range(self.rows):
+            for c in range(self.cols):
+                h ^= self.zobrist[r][c][self.cell(r, c)]
+
+        return h
+
+
+    def cell(self, r, c):
+        i = r * self.layout.stride + c
+
+        for v, b in enumerate(self.bits, 1):
+            if b >> i & 1:
+                return v
+
+        return 0
+
+
+    def set_cell(self, r, c, v):
+        old = self.cell(r, c)
+        keys = self.zobrist[r][c]
+        self.hash ^= keys[old] ^ keys[v]
+
+        bit = 1 << (r * self.layout.stride + c)
+        if old:
+            self.bits[old - 1] ^= bit
+        if v:
+            self.bits[v - 1] |= bit
+        self.stable = False
+
+
+    def swap(self, a, b):
+        (r1, c1), (r2, c2) = a, b
+        v1, v2 = self.cell(r1, c1), self.cell(r2, c2)
+
+        if v1 == v2:
+            return
+
+        k1, k2 = self.zobrist[r1][c1], self.zobrist[r2][c2]
+        self.hash ^= k1[v1] ^ k1[v2] ^ k2[v2] ^ k2[v1]
+
+        w = self.layout.stride
+        both = (1 << (r1 * w + c1)) | (1 << (r2 * w + c2))
+        if v1:
+            self.bits[v1 - 1] ^= both
+        if v2:
+            self.bits[v2 - 1] ^= both
+        # Fiecare culoare pierde o celula si o castiga pe cealalta
+        self.stable = False
+
+
+    def mark(self):
+        # Bitboard-urile sunt 4 intregi: punctul de revenire este chiar starea
+        return tuple(self.bits), self.hash, self.stable
+
+
+    def undo(self, point):
+        bits, self.hash, self.stable = point
+        self.bits = list(bits)
+        self.dirty_cols = None
+
+
+    snapshot = mark
+    restore = undo
+    # Punctul de revenire este deja o copie completa a starii
+
+
+    def _run_length(self, i, step):
+        # Lungimea secventei care incepe la bitul i, cu pasul step (1 sau stride)
+
+        v = self.bits[[b >> i & 1 for b in self.bits].index(1)]
+        n = 5
+        # Apelata doar pentru secvente de minim 5
+
+        while v >> (i + n * step) & 1:
+            n += 1
+
+        return n
+
+
+    def detect_formations(self, dirty=None):
+        # Aceeasi lista (si aceeasi ordine) ca Board.detect_formations.
+        # Parametrul dirty este acceptat pentru compatibilitate; scanarea
+        # completa costa cateva zeci de operatii pe intregi.
+
+        forms = []
+        rows, cols = self.rows, self.cols
+        layout = self.layout
+        w = layout.stride
+        column_bits = column_run_masks(rows, cols)
+
+        h3 = h4 = h5 = v3 = v4 = v5 = 0
+        # Inceputurile secventelor de minim 3 / 4 / 5, pe orizontala si pe verticala
+        lt = []
+        # Culorile care au si secvente orizontale si verticale (doar ele pot forma L/T)
+
+        for b in self.bits:
+            s = b & (b >> 1) & (b >> 2) & ~(b << 1)
+            # Celule urmate de inca doua de aceeasi culoare, fara una la stanga
+            if s:
+                s4 = s & (b >> 3)
+                h3 |= s
+                h4 |= s4
+                h5 |= s4 & (b >> 4)
+
+            t = b & (b >> w) & (b >> 2 * w) & ~(b << w)
+            if t:
+                t4 = t & (b >> 3 * w)
+                v3 |= t
+                v4 |= t4
+                v5 |= t4 & (b >> 4 * w)
+
+            if s and t:
+                lt.append(b)
+
+        # ================= LINII ORIZONTALE (rand-major) =================
+        for i in mask_indices(h3):
+            if not h4 >> i & 1:
+                length = 3
+            elif not h5 >> i & 1:
+                length = 4
+            else:
+                length = self._run_length(i, 1)
+
+            kind = 'LINE3' if length == 3 else 'LINE4' if length == 4 else 'LINE5'
+            forms.append(Formation(((1 << length) - 1) << (i - 2 * (i // w)), SCORES[kind], kind, length, cols))
+            # i - 2 * rand = indicele compact r * cols + c
+
+        # ================= LINII VERTICALE (coloana cu coloana) =================
+        for i in sorted(mask_indices(v3), key=lambda i: (i % w, i)):
+            if not v4 >> i & 1:
+                length = 3
+            elif not v5 >> i & 1:
+                length = 4
+            else:
+                length = self._run_length(i, w)
+
+            kind = 'LINE3' if length == 3 else 'LINE4' if length == 4 else 'LINE5'
+            forms.append(Formation(column_bits[length] << (i - 2 * (i // w)), SCORES[kind], kind, length, cols))
+
+        # ================= FORME DE L si T =================
+        # Ancorele fiecarei forme: AND intre culoare si culoarea deplasata cu
+        # fiecare deplasare a formei; apoi ordinea din Board (ancora, forma)
+        if lt:
+            for kind in ('L33', 'T333'):
+                score = SCORES[kind]
+                table = layout.shapes[kind]
+                found = []
+
+                for k, (offsets, _, _) in enumerate(table):
+                    m = 0
+
+                    for b in lt:
+                        x = b
+                        for o in offsets:
+                            x &= shifted(b, o)
+                        m |= x
+
+                    found.extend((i, k) for i in mask_indices(m))
+
+                found.sort()
+
+                for i, k in found:
+                    _, mask, low = table[k]
+                    forms.append(Formation(mask << (i - 2 * (i // w) + low), score, kind, 5, cols))
+
+        return forms
+
+
+    def apply_eliminations(self, formations):
+        union = 0
+        for f in formations:
+            union |= f.mask
+
+        if not union:
+            return 0
+
+        layout = self.layout
+        cut = layout.spread(union)
+        h = self.hash
+        removed = 0
+
+        for v, b in enumerate(self.bits):
+            hit = b & cut
+
+            if hit:
+                self.bits[v] = b ^ hit
+                h ^= layout.zxor(hit, v + 1) ^ layout.zxor(hit, 0)
+                removed += bin(hit).count('1')
+
+        self.hash = h
+        self.stable = False
+
+        return removed
+
+
+    def apply_gravity_and_refill(self, rng=None):
+        # Gravitatia pe toate coloanele deodata: la fiecare pas, bomboanele cu
+        # gol dedesubt coboara un rand (cel mult rows pasi). Refill-ul cere
+        # valorile de la rng in aceeasi ordine ca Board (coloana cu coloana,
+        # de jos in sus).
+
+        if rng is None:
+            rng = random
+
+        layout = self.layout
+        w = layout.stride
+        bits = self.bits
+        occ = bits[0] | bits[1] | bits[2] | bits[3]
+        holes = layout.full & ~occ
+
+        dirty = {}
+        self.dirty_cols = dirty
+
+        if not holes:
+            return
+
+        for c, column in enumerate(layout.columns):
+            x = holes & column
+            if x:
+                dirty[c] = (x.bit_length() - 1) // w
+                # Cel mai jos gol din coloana
+
+        before = bits[:]
+        emptied = holes
+
+        while True:
+            fall = occ & (holes >> w)
+            # Bomboanele care au gol imediat dedesubt
+
+            if not fall:
+                break
+
+            moved = fall | (fall << w)
+
+            for v in range(4):
+                m = bits[v] & fall
+                if m:
+                    bits[v] ^= m | (m << w)
+
+            occ ^= moved
+            holes ^= moved
+
+        for c in dirty:
+            x = holes & layout.columns[c]
+            # Golurile au ajuns in varful coloanei
+
+            for r in range((x.bit_length() - 1) // w, -1, -1):
+                v = rng.randint(1, 4)
+                bits[v - 1] |= 1 << (r * w + c)
+
+        h = self.hash ^ layout.zxor(emptied, 0)
+
+        for v in range(4):
+            h ^= layout.zxor(before[v] ^ bits[v], v + 1)
+        # Fiecare celula schimbata scoate cheia valorii vechi si o pune pe cea noua
+
+        self.hash = h
+        self.stable = False
+
+
+    def _move_masks(self):
+        # Mastile swap-urilor care formeaza ceva pe o tabla stabila: bitul celulei
+        # p in down (swap cu celula de dedesubt) sau right (cu cea din dreapta).
+        # Dupa swap, celula care primeste culoarea b formeaza o linie daca doi
+        # vecini (fara celula cu care a facut swap) din aceeasi directie au culoarea b
+
+        w = self.layout.stride
+        down = right = 0
+
+        for b in self.bits:
+            if not b:
+                continue
+
+            l1, l2, r1, r2, r3 = b << 1, b << 2, b >> 1, b >> 2, b >> 3
+            u1, u2, d1, d2, d3 = b << w, b << 2 * w, b >> w, b >> 2 * w, b >> 3 * w
+            # Vecinul din stanga / dreapta / sus / jos are culoarea b
+
+            vert = (u1 & u2) | (u1 & d1) | (d1 & d2)
+            horiz = (l1 & l2) | (l1 & r1) | (r1 & r2)
+            # Celula ar fi intr-o linie verticala / orizontala daca ar avea culoarea b
+
+            right |= r1 & ~b & ((l1 & l2) | vert)
+            right |= b & ~r1 & ((r2 & r3) | (vert >> 1))
+            down |= d1 & ~b & ((u1 & u2) | horiz)
+            down |= b & ~d1 & ((d2 & d3) | (horiz >> w))
+
+        return down & self.layout.down, right & self.layout.right
+
+
+    def candidate_swaps(self):
+        # Swap-urile care formeaza ceva, din mastile _move_masks, in ordinea de scanare
+
+        if not self.stable:
+            if self.detect_formations():
+                # Pe o tabla instabila orice swap poate aduce puncte
+                return self.adjacent_swaps()
+            self.stable = True
+
+        down, right = self._move_masks()
+        w = self.layout.stride
+        swaps = []
+
+        for i in mask_indices(down | right):
+            r, c = divmod(i, w)
+            if down >> i & 1:
+                swaps.append(((r, c), (r + 1, c)))
+            if right >> i & 1:
+                swaps.append(((r, c), (r, c + 1)))
+
+        return swaps
+
+
+    def any_possible_swap_creates_formation(self):
+        # Aceleasi mutari ca sabloanele din Board, pentru toata tabla deodata
+        down, right = self._move_masks()
+        return bool(down | right)
+
+
+ENGINES = {
+    'python': Board,
+    'numpy': NumpyBoard,
+    'bitboard': BitBoard,
+}
+# Implementarile de tabla selectabile cu --engine
+
+
+def select_non_overlapping(forms):
+    """
+    Selecteaza greedy formatiile:
+    - sortate descrescator dupa scor
+    - fara suprapuneri de celule
+    """
+
+    forms_sorted = sorted(forms, key=lambda f: (-f.score, -f.size))
+    # Sortam dupa scor si marime
+
+    chosen = []
+    # Lista de formatii alese
+
+    used = 0
+    # Celule deja folosite (bitmask)
+
+    for f in forms_sorted:
+        if f.mask & used:
+            continue
+        chosen.append(f)
+        used |= f.mask
+
+    return chosen
+
+
+def _best_independent(cands, adj, scores, memo, total):
+    # Cea mai buna submultime fara conflicte din cands (bitset de indici):
+    # (scor, bitset ales). Indicii mici sunt formatiile mai valoroase.
+    # total = suma scorurilor din cands (margine superioara, tinuta incremental)
+
+    if not cands:
+        return 0, 0
+
+    known = memo.get(cands)
+
+    if known is not None:
+        return known
+
+    low = cands & -cands
+    i = low.bit_length() - 1
+    # Formatia cea mai valoroasa ramasa
+
+    rest = cands ^ low
+    rest_total = total - scores[i]
+    blocked = rest & adj[i]
+    # Formatiile ramase care se suprapun cu ea
+
+    kept_total = rest_total
+    for j in mask_indices(blocked):
+        kept_total -= scores[j]
+
+    score, bits = _best_independent(rest ^ blocked, adj, scores, memo, kept_total)
+    best = (score + scores[i], bits | low)
+    # Ramura in care o alegem
+
+    if blocked and rest_total > best[0]:
+        # Are conflicte: incercam si fara ea, daca restul poate depasi ramura de mai sus
+        other = _best_independent(rest, adj, scores, memo, rest_total)
+        if other[0] > best[0]:
+            best = other
+
+    memo[cands] = best
+
+    return best
+
+
+def select_optimal(forms):
+    """
+    Selecteaza exact submultimea de formatii fara suprapuneri cu scor total
+    maxim (de ex. doua LINE4 in locul unui L33 care le blocheaza).
+    Graful de conflicte este impartit in componente conexe; fiecare
+    componenta se rezolva prin branch-and-bound cu memorare. La scor egal
+    se pastreaza alegerea greedy (formatia mai valoroasa intai).
+    """
+
+    forms_sorted = sorted(forms, key=lambda f: (-f.score, -f.size))
+    # Aceeasi ordine ca la greedy
+
+    n = len(forms_sorted)
+
+    if n <= 1:
+        return forms_sorted
+
+    seen = shared = 0
+    # shared = celulele acoperite de cel putin doua formatii
+
+    for f in forms_sorted:
+        shared |= seen & f.mask
+        seen |= f.mask
+
+    if not shared:
+        return forms_sorted
+        # Nicio suprapunere: intra toate, ca la greedy
+
+    conflicts = [i for i, f in enumerate(forms_sorted) if f.mask & shared]
+    # Formatiile care ating o celula comuna; restul intra direct
+
+    chosen = (1 << n) - 1
+    remaining = 0
+
+    for i in conflicts:
+        chosen ^= 1 << i
+        remaining |= 1 << i
+
+    adj = [0] * n
+    # adj[i] = bitset cu formatiile care se suprapun cu formatia i
+
+    if len(conflicts) <= 32:
+        # Putine formatii: comparam perechile direct
+        for k, i in enumerate(conflicts):
+            mask = forms_sorted[i].mask
+            for j in conflicts[k + 1:]:
+                if mask & forms_sorted[j].mask:
+                    adj[i] |= 1 << j
+                    adj[j] |= 1 << i
+    else:
+        # Multe formatii (table mari): grupam dupa celulele comune, nu pe perechi
+        owners = defaultdict(int)
+        cells = []
+
+        for i in conflicts:
+            common = forms_sorted[i].mask & shared
+            bit = 1 << i
+            mine = []
+            while common:
+                cell = common & -common
+                owners[cell] |= bit
+                mine.append(cell)
+                common ^= cell
+            cells.append(mine)
+            # Cheia este chiar bitul celulei (fara indice: mastile sunt mari)
+
+        for i, mine in zip(conflicts, cells):
+            bits = 0
+            for cell in mine:
+                bits |= owners[cell]
+            adj[i] = bits ^ (1 << i)
+
+    scores = [f.score for f in forms_sorted]
+
+    while remaining:
+        comp = frontier = remaining & -remaining
+        # Componenta conexa care contine primul indice ramas
+
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            new = adj[low.bit_length() - 1] & remaining & ~comp
+            comp |= new
+            frontier |= new
+
+        remaining &= ~comp
+
+        rest = comp & (comp - 1)
+
+        if rest & (rest - 1):
+            total = sum(scores[i] for i in mask_indices(comp))
+            chosen |= _best_independent(comp, adj, scores, {}, total)[1]
+        else:
+            chosen |= comp & -comp
+            # Doua formatii in conflict: o alegem pe cea mai valoroasa (ca greedy)
+
+    return [f for i, f in enumerate(forms_sorted) if chosen >> i & 1]
+
+
+SELECTIONS = {
+    'greedy': select_non_overlapping,
+    'optimal': select_optimal,
+}
+# Strategiile de selectie a formatiilor, selectabile cu --selection
+
+
+class SearchPlayer:
+    """
+    Jucator cu cautare pe mai multe mutari (beam search pe adancime depth).
+    La fiecare nivel pastram doar cele mai bune beam stari (dupa scorul
+    acumulat); valoarea unei mutari de la radacina este cel mai bun scor
+    acumulat pe o linie care incepe cu ea. Copiii aceluiasi nod sunt
+    evaluati pe aceeasi tabla cu mark()/undo(), deci copiem tabla doar
+    pentru starile care raman in beam, nu pentru fiecare nod.
+
+    Cu samples > 0 (expectimax pe refill-uri esantionate), cautarea se
+    repeta pentru samples fluxuri de refill diferite si valoarea unei
+    mutari este media peste ele: refill-ul real nu este cunoscut dinainte.
+
+    Cu move_time (secunde), adancimea creste iterativ (1, 2, ... depth)
+    cat timp mai avem timp; se pastreaza rezultatul ultimei adancimi
+    terminate. Adancimea 1 se termina mereu si da exact find_best_swap.
+    Cu table (TranspositionTable), evaluarile se refolosesc intre
+    iteratii si intre mutari.
+    """
+
+    def __init__(self, depth=2, beam=8, samples=0, move_time=None, table=None):
+        self.depth = depth
+        self.beam = beam
+        self.samples = samples
+        self.move_time = move_time
+        self.table = table
+
+        self.nodes = 0
+        # Noduri evaluate (swap + cascade), cumulat pe toate mutarile
+        self.seconds = 0.0
+        # Timpul total petrecut in cautare
+        self.depth_reached = 0
+        # Adancimea terminata la ultima mutare
+
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+    def _evaluate(self, node, a, b, stream, keep=False):
+        # (scor, cascade, stare) pentru swap-ul a <-> b din starea node, pe loc:
+        # aplicam, rezolvam si revenim cu undo. (scor, cascade) este acelasi ca
+        # simulate_swap(a, b, stream) si se memoreaza in table dupa
+        # (hash, swap, flux). Cu keep, stare = snapshot() al tablei rezultate,
+        # ca _beam sa nu mai simuleze copiii pastrati; None la un hit in table
+
+        key = (node.hash, a, b, stream.key)
+        table = self.table
+        result = table.get(key) if table is not None else None
+        state = None
+
+        if result is None:
+            (r, c), (r2, c2) = a, b
+            point = node.mark()
+            node.swap(a, b)
+            result = node.resolve_all_cascades(rng=stream.child(r, c, r2, c2))
+            if keep:
+                state = node.snapshot()
+            node.undo(point)
+            self.nodes += 1
+
+            if table is not None:
+                table.put(key, result)
+
+        return result[0], result[1], state
+
+
+    def _beam(self, board, stream, depth, deadline):
+        # O cautare beam pe adancimea data, intr-o singura "lume" de refill.
+        # Intoarce ({mutare: cel mai bun scor acumulat}, {mutare: (scor, cascade)})
+        # sau None daca a expirat timpul
+
+        values = {}
+        first = {}
+        level = [(0, None, board, stream)]
+        # Starile din beam: (scor acumulat, mutarea de la radacina, tabla, flux)
+
+        for d in range(depth):
+            children = []
+
+            keep = d < depth - 1
+            # Starile copiilor conteaza doar daca mai urmeaza un nivel
+
+            for score, move, node, nstream in level:
+                for a, b in node.candidate_swaps():
+                    gained, casc, state = self._evaluate(node, a, b, nstream, keep)
+
+                    if gained <= 0:
+                        continue
+
+                    root = move or (a, b)
+                    total = score + gained
+
+                    if move is None:
+                        first[root] = (gained, casc)
+
+                    if total > values.get(root, 0):
+                        values[root] = total
+
+                    children.append((total, root, node, a, b, nstream, state))
+
+                if deadline is not None and time.perf_counter() > deadline:
+                    return None
+
+            if d == depth - 1 or not children:
+                break
+
+            children.sort(key=lambda t: -t[0])
+            # Sortare stabila: la egalitate ramane ordinea de scanare
+            level = []
+
+            for total, root, node, a, b, nstream, state in children[:self.beam]:
+                (r, c), (r2, c2) = a, b
+                child = node.copy()
+
+                if state is not None:
+                    child.restore(state)
+                    # Starea calculata deja de _evaluate, fara alta simulare
+                else:
+                    child.swap(a, b)
+                    child.resolve_all_cascades(rng=nstream.child(r, c, r2, c2))
+                    # Rezultat venit din table: simulam copilul o singura data
+
+                level.append((total, root, child, nstream.child(r, c, r2, c2)))
+                # Doar starile pastrate in beam primesc o copie
+
+        return values, first
+
+
+    def choose(self, board, stream):
+        # Alege mutarea: (a, b, scor, cascade) ca find_best_swap, sau None.
+        # scor si cascade sunt cele ale mutarii insesi (adancimea 1)
+
+        start = time.perf_counter()
+        deadline = start + self.move_time if self.move_time else None
+
+        worlds = [stream.child(s) for s in range(self.samples)] if self.samples else [stream]
+        # Fluxurile de refill pe care mediem (expectimax esantionat)
+
+        best = None
+
+        for depth in range(1, self.depth + 1):
+            results = []
+
+            for world in worlds:
+                found = self._beam(board, world, depth, deadline if depth > 1 else None)
+
+                if found is None:
+                    break
+
+                results.append(found)
+
+            if len(results) < len(worlds):
+                break
+                # Timp expirat: pastram adancimea anterioara
+
+            values, first = results[0]
+
+            if len(results) > 1:
+                totals = defaultdict(int)
+                for vals, _ in results:
+                    for move, v in vals.items():
+                        totals[move] += v
+                values = {move: v / len(results) for move, v in totals.items()}
+
+            best = None
+
+            for (a, b), value in values.items():
+                (r, c), (r2, c2) = a, b
+                gained, casc = first[(a, b)]
+                key = (value, gained, -casc, -r, -c, -r2, -c2)
+                # La egalitate: scorul imediat, apoi criteriul din find_best_swap
+
+                if best is None or key > best[0]:
+                    best = (key, a, b, gained, casc)
+
+            self.depth_reached = depth
+
+            if best is None or (deadline is not None and time.perf_counter() > deadline):
+                break
+
+        self.seconds += time.perf_counter() - start
+
+        if best is None:
+            return None
+
+        return best[1], best[2], best[3], best[4]
+
+
+def _write_varint(buf, n):
+    # Intreg nenegativ -> 7 biti pe octet, bitul 8 marcheaza continuarea
+
+    while n >= 0x80:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+
+    buf.append(n)
+
+
+def _read_varint(data, pos):
+    # Inversul lui _write_varint: (valoare, pozitia urmatoare)
+
+    n = shift = 0
+
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+
+        if b < 0x80:
+            return n, pos
+
+        shift += 7
+
+
+def _pack_values(buf, values):
+    # Valori 1..4, cate 2 biti (4 pe octet)
+
+    for i in range(0, len(values), 4):
+        byte = 0
+        for j, v in enumerate(values[i:i + 4]):
+            byte |= (v - 1) << (2 * j)
+        buf.append(byte)
+
+
+def _unpack_values(data, pos, n):
+    # Inversul lui _pack_values: (lista de n valori, pozitia urmatoare)
+
+    size = (n + 3) // 4
+    values = [((data[pos + i // 4] >> (2 * (i % 4))) & 3) + 1 for i in range(n)]
+
+    return values, pos + size
+
+
+TRACE_KINDS = tuple(SCORES)
+# Tipul unei formatii se salveaza in trace ca indice in aceasta lista
+
+
+class TraceRecorder:
+    """
+    Inregistreaza un joc intr-un format binar compact (vezi decode_trace):
+    tabla initiala (2 biti pe celula), apoi pentru fiecare mutare swap-ul,
+    formatiile selectate in fiecare cascada si valorile de refill.
+    Obiectul se foloseste si ca RNG de refill (randint retine valorile
+    generate), deci jocul ramane identic cu sau fara trace.
+
+    Codificare (toate numerele sunt varint):
+    - antet: rows, cols, apoi grid-ul initial impachetat
+    - mutare: 1 + (indice_a * 2 + directie) pentru swap (directie 0 = jos,
+      1 = dreapta), sau 0 pentru reshuffle urmat de noul grid impachetat;
+      pentru starea initiala nu exista antet de mutare
+    - cascada: numarul de formatii (>= 1), apoi pe formatie diferenta fata de
+      bitul cel mai mic al formatiei anterioare, tipul (un octet) si masca
+      deplasata la bitul ei cel mai mic; apoi valorile de refill impachetate
+      (cate celule au fost eliminate); lista de cascade se termina cu 0
+    """
+
+    def __init__(self, board, rng):
+        self.rng = rng
+        self.cols = board.cols
+        self.values = []
+        # Valorile de refill din cascada curenta
+
+        self.buf = bytearray()
+        _write_varint(self.buf, board.rows)
+        _write_varint(self.buf, board.cols)
+        _pack_values(self.buf, [board.cell(r, c) for r in range(board.rows) for c in range(board.cols)])
+
+    def randint(self, a, b):
+        v = self.rng.randint(a, b)
+        self.values.append(v)
+        return v
+
+    def swap(self, a, b):
+        if b < a:
+            a, b = b, a
+            # Swap-ul este simetric: codificam mereu din celula de sus / din stanga
+
+        (r, c), (r2, c2) = a, b
+
+        if (r2 - r, c2 - c) not in ((1, 0), (0, 1)):
+            raise ValueError(f'swap intre celule care nu sunt vecine: {a} <-> {b}')
+
+        _write_varint(self.buf, 1 + (r * self.cols + c) * 2 + (c2 - c))
+
+    def reshuffle(self, board):
+        self.buf.append(0)
+        _pack_values(self.buf, [board.cell(r, c) for r in range(board.rows) for c in range(board.cols)])
+
+    def cascade(self, selected):
+        buf = self.buf
+        _write_varint(buf, len(selected))
+        prev = 0
+
+        for low, f in sorted(((f.mask & -f.mask).bit_length() - 1, f) for f in selected):
+            _write_varint(buf, low - prev)
+            buf.append(TRACE_KINDS.index(f.type))
+            _write_varint(buf, f.mask >> low)
+            prev = low
+
+        _pack_values(buf, self.values)
+        self.values.clear()
+
+    def end_move(self):
+        self.buf.append(0)
+        # Sfarsitul listei de cascade
+
+    def getvalue(self):
+        return bytes(self.buf)
+
+
+def decode_trace(data):
+    """
+    Decodeaza un trace (vezi TraceRecorder) in (rows, cols, grid, moves).
+    moves[0] este ('init', None, cascade) pentru cascadele initiale, apoi
+    ('swap', (a, b), cascade) sau ('reshuffle', grid, []) pentru fiecare
+    mutare; cascade este lista de (formatii, valori de refill).
+    """
+
+    rows, pos = _read_varint(data, 0)
+    cols, pos = _read_varint(data, pos)
+    flat, pos = _unpack_values(data, pos, rows * cols)
+    grid = [flat[r * cols:(r + 1) * cols] for r in range(rows)]
+
+    moves = []
+    kind, payload = 'init', None
+
+    while pos < len(data):
+        if kind is None:
+            h, pos = _read_varint(data, pos)
+
+            if h == 0:
+                flat, pos = _unpack_values(data, pos, rows * cols)
+                moves.append(('reshuffle', [flat[r * cols:(r + 1) * cols] for r in range(rows)], []))
+                continue
+
+            i, right = divmod(h - 1, 2)
+            r, c = divmod(i, cols)
+            kind, payload = 'swap', ((r, c), (r, c + 1) if right else (r + 1, c))
+
+        cascades = []
+
+        while True:
+            n, pos = _read_varint(data, pos)
+
+            if n == 0:
+                break
+
+            forms = []
+            union = low = 0
+
+            for _ in range(n):
+                delta, pos = _read_varint(data, pos)
+                low += delta
+                kind_name = TRACE_KINDS[data[pos]]
+                rel, pos = _read_varint(data, pos + 1)
+                mask = rel << low
+                forms.append(Formation(mask, SCORES[kind_name], kind_name, bin(mask).count('1'), cols))
+                union |= mask
+
+            values, pos = _unpack_values(data, pos, bin(union).count('1'))
+            cascades.append((forms, values))
+
+        moves.append((kind, payload, cascades))
+        kind = None
+
+    return rows, cols, grid, moves
+
+
+class _ReplayRng:
+    # "RNG" care intoarce valorile de refill salvate, in ordine
+
+    def __init__(self, values):
+        self.values = iter(values)
+
+    def randint(self, a, b):
+        return next(self.values)
+
+
+def replay_cascade(board, forms, values):
+    # Reaplica o cascada din trace: eliminare + gravitatie cu refill-ul salvat
+    board.apply_eliminations(forms)
+    board.apply_gravity_and_refill(_ReplayRng(values))
+
+
+def replay_trace(data, swaps=None, engine='python'):
+    """
+    Reconstruieste tabla dintr-un trace dupa primele swaps mutari (cu
+    cascadele lor; None = finalul jocului), fara detectare si fara cautare:
+    doar eliminarile si refill-urile inregistrate.
+    Intoarce (tabla, scorul acumulat).
+    """
+
+    rows, cols, grid, moves = decode_trace(data)
+    board = ENGINES[engine](rows, cols, grid=grid)
+    score = 0
+    done = 0
+
+    for kind, payload, cascades in moves:
+        if kind == 'swap':
+            if swaps is not None and done >= swaps:
+                break
+            board.swap(*payload)
+            done += 1
+        elif kind == 'reshuffle':
+            for r, row in enumerate(payload):
+                for c, v in enumerate(row):
+                    board.set_cell(r, c, v)
+
+        for forms, values in cascades:
+            score += sum(f.score for f in forms)
+            replay_cascade(board, forms, values)
+
+    return board, score
+
+
+TRACE_FILE_MAGIC = b'CCTRACE1'
+# Fisierul cu trace-uri: marcaj, apoi pe joc varint game_id, varint lungime, trace
+
+
+def write_trace_record(fh, gid, data):
+    # Adauga trace-ul unui joc la un fisier deschis binar (scrie marcajul daca e gol)
+
+    if fh.tell() == 0:
+        fh.write(TRACE_FILE_MAGIC)
+
+    head = bytearray()
+    _write_varint(head, gid)
+    _write_varint(head, len(data))
+    fh.write(bytes(head) + data)
+
+
+def iter_trace_file(path):
+    # Produce (game_id, trace) din fisier; un ultim joc scris partial este ignorat
+
+    with open(path, 'rb') as fh:
+        data = fh.read()
+
+    if not data.startswith(TRACE_FILE_MAGIC):
+        raise ValueError(f'{path}: nu este un fisier de trace-uri')
+
+    pos = len(TRACE_FILE_MAGIC)
+
+    while pos < len(data):
+        try:
+            gid, p = _read_varint(data, pos)
+            n, p = _read_varint(data, p)
+        except IndexError:
+            return
+
+        if p + n > len(data):
+            return
+
+        yield gid, data[p:p + n]
+        pos = p + n
+
+
+def resume_trace(path, done):
+    """
+    Pregateste un fisier de trace-uri pentru continuare (ca resume_csv):
+    taie un eventual ultim joc scris partial si pastreaza doar trace-urile
+    jocurilor din done (cu rezultat salvat), fiecare o singura data.
+    Intoarce numarul de trace-uri pastrate.
+    """
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+
+    with open(path, 'rb') as fh:
+        data = fh.read()
+
+    if not data.startswith(TRACE_FILE_MAGIC):
+        raise ValueError(f'{path}: nu este un fisier de trace-uri')
+
+    pos = len(TRACE_FILE_MAGIC)
+    kept = []
+    # Intervalele (start, end) ale inregistrarilor pastrate
+    seen = set()
+    dropped = False
+
+    while pos < len(data):
+        try:
+            gid, p = _read_varint(data, pos)
+            n, p = _read_varint(data, p)
+        except IndexError:
+            break
+
+        if p + n > len(data):
+            break
+
+        if gid in done and gid not in seen:
+            seen.add(gid)
+            kept.append((pos, p + n))
+        else:
+            dropped = True
+
+        pos = p + n
+
+    if not dropped:
+        # Toate inregistrarile complete raman: ajunge sa taiem coada
+        if pos < len(data):
+            with open(path, 'rb+') as fh:
+                fh.truncate(pos)
+        return len(kept)
+
+    tmp = path + '.tmp'
+
+    with open(tmp, 'wb') as fh:
+        fh.write(TRACE_FILE_MAGIC)
+        for start, end in kept:
+            fh.write(data[start:end])
+
+    os.replace(tmp, path)
+    # Fisierul rescris il inlocuieste pe cel vechi dintr-o singura operatie
+
+    return len(kept)
+
+
+PROFILE_PHASES = ('detect_formations', 'select', 'apply_eliminations', 'apply_gravity_and_refill',
+                  'candidate_swaps', 'find_best_swap')
+# Fazele masurate de --profile (timpii sunt inclusivi: find_best_swap contine
+# si candidate_swaps, si simularile cu detectare, selectie etc.)
+
+
+class PhaseProfiler:
+    """
+    Numara apelurile si nanosecundele cumulate pentru fiecare faza din
+    PROFILE_PHASES. La intrarea in with inlocuieste metodele clasei de tabla
+    (si functiile din SELECTIONS) cu variante cronometrate, iar la iesire
+    le pune inapoi: fara profiler codul jocului ruleaza neschimbat, deci
+    dezactivat nu costa nimic. Se acopera si copiile din simulari, fiindca
+    modificarea este pe clasa, nu pe instanta.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.calls = dict.fromkeys(PROFILE_PHASES, 0)
+        self.ns = dict.fromkeys(PROFILE_PHASES, 0)
+        self.saved = []
+
+    def wrap(self, phase, fn):
+        calls, ns = self.calls, self.ns
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                ns[phase] += clock() - t0
+                calls[phase] += 1
+
+        return timed
+
+    def __enter__(self):
+        for phase in PROFILE_PHASES:
+            if phase == 'select':
+                for name, fn in SELECTIONS.items():
+                    self.saved.append((SELECTIONS, name, fn))
+                    SELECTIONS[name] = self.wrap(phase, fn)
+            else:
+                self.saved.append((self.cls, phase, self.cls.__dict__.get(phase)))
+                setattr(self.cls, phase, self.wrap(phase, getattr(self.cls, phase)))
+                # Metoda mostenita se umbreste pe clasa si se sterge la iesire
+
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, orig in reversed(self.saved):
+            if owner is SELECTIONS:
+                SELECTIONS[name] = orig
+            elif orig is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, orig)
+
+        self.saved.clear()
+
+    def counters(self):
+        # Coloanele de rezultat: <faza>_calls si <faza>_ns
+
+        out = {}
+
+        for phase in PROFILE_PHASES:
+            out[f'{phase}_calls'] = self.calls[phase]
+            out[f'{phase}_ns'] = self.ns[phase]
+
+        return out
+
+
+def refill_random(seed):
+    # RNG-ul de refill al unui joc: derivat din seed, dar independent de
+    # random.seed(seed), din care se genereaza tabla initiala (altfel refill-ul
+    # ar repeta exact valorile tablei de start)
+
+    return random.Random(None if seed is None else f'{seed}:refill')
+
+
+def play_single_game(rows=11, cols=11, target=10000, seed=None, rng=None, engine='python',
+                     top_k=None, grid=None, tt_size=0, selection='greedy', player='greedy',
+                     depth=2, beam=8, samples=4, move_time=None, reshuffle=0, trace=False,
+                     profile=False):
+    # Ruleaza un singur joc complet
+    # engine alege implementarea tablei (vezi ENGINES)
+    # top_k limiteaza simularea completa la cei mai buni candidati (vezi find_best_swap)
+    # grid (optional) este tabla initiala predefinita; altfel se genereaza random
+    # rng (optional) inlocuieste RNG-ul de refill (implicit refill_random(seed))
+    # tt_size > 0 memoreaza simularile intr-un TranspositionTable de aceasta marime;
+    # rezultatul primeste atunci si tt_hits / tt_misses. Doar pentru player beam /
+    # expectimax: greedy simuleaza fiecare swap o singura data pe mutare, iar cheia
+    # (hash tabla, swap, flux) contine mutarea, deci nu s-ar repeta niciodata
+    # selection alege strategia de selectie a formatiilor (vezi SELECTIONS)
+    # Simularile din cautare folosesc fluxul RefillStream(seed, mutare, swap, cascada),
+    # deci nu consuma random global si sunt reproductibile
+    # player: 'greedy' (find_best_swap), 'beam' sau 'expectimax' (SearchPlayer cu
+    # depth, beam, samples si move_time); cautarea adauga search_nodes si nodes_per_sec
+    # reshuffle: de cate ori putem amesteca o tabla fara mutari in loc sa oprim jocul
+    # (ca in jocul real); cu reshuffle > 0 rezultatul primeste si reshuffles
+    # trace=True inregistreaza jocul (vezi TraceRecorder) in result['trace'] (bytes)
+    # profile=True adauga numarul de apeluri si timpul pe faze (vezi PhaseProfiler)
+
+    if profile:
+        with PhaseProfiler(ENGINES[engine]) as profiler:
+            result = play_single_game(rows, cols, target, seed=seed, rng=rng, engine=engine, top_k=top_k,
+                                      grid=grid, tt_size=tt_size, selection=selection, player=player,
+                                      depth=depth, beam=beam, samples=samples, move_time=move_time,
+                                      reshuffle=reshuffle, trace=trace)
+        result.update(profiler.counters())
+        return result
+
+    board = ENGINES[engine](rows, cols, seed=None, grid=grid)
+    # Initializam tabla
+
+    board.select = SELECTIONS[selection]
+
+    refill_rng = rng if rng is not None else refill_random(seed)
+    # RNG separat pentru refill (derivat din seed, nu acelasi flux ca tabla)
+
+    if tt_size and player == 'greedy':
+        raise ValueError('tt_size are efect doar cu player beam sau expectimax')
+
+    table = TranspositionTable(tt_size) if tt_size else None
+
+    lookahead = RefillStream(seed if seed is not None else random.getrandbits(64))
+    # Fluxul radacina pentru simularile din find_best_swap
+
+    searcher = None
+
+    if player != 'greedy':
+        searcher = SearchPlayer(depth, beam, samples if player == 'expectimax' else 0, move_time, table)
+
+    recorder = TraceRecorder(board, refill_rng) if trace else None
+    game_rng = recorder or refill_rng
+    # Cu trace, refill-ul trece prin recorder (aceleasi valori, in aceeasi ordine)
+
+    initial_score, initial_casc = board.resolve_all_cascades(rng=game_rng, trace=recorder)
+    # Eliminam formatiile initiale
+
+    if recorder:
+        recorder.end_move()
+
+    total_score = initial_score
+    total_swaps = 0
+    total_cascades = initial_casc
+    moves_to_10000 = None
+    reshuffles = 0
+
+    while True:
+        if total_score >= target and moves_to_10000 is None:
+            moves_to_10000 = total_swaps
+
+        if not board.any_possible_swap_creates_formation():
+            # Tabla moarta: verificarea cu sabloane costa O(rows*cols), deci nu mai
+            # rulam cautarea completa ca sa aflam ca nu exista mutari
+
+            if reshuffles < reshuffle and board.reshuffle(refill_rng):
+                reshuffles += 1
+                if recorder:
+                    recorder.reshuffle(board)
+                continue
+
+            best = None
+        elif searcher is None:
+            best = board.find_best_swap(top_k=top_k, stream=lookahead.child(total_swaps))
+        else:
+            best = searcher.choose(board, lookahead.child(total_swaps))
+        # Cautam cea mai buna mutare
+
+        if best is None:
+            # Daca nu mai exista mutari
+            result = {
+                'points': total_score,
                 'swaps': total_swaps,
                 'total_cascades': total_cascades,
                 'reached_target': total_score >= target,
                 'stopping_reason': 'NO_MOVES',
                 'moves_to_10000': moves_to_10000 if total_score >= target else ''
             }
+            break
 
         a, b, gained, casc = best
 
@@ -502,14 +2972,20 @@ def play_single_game(rows=11, cols=11, target=10000, seed=None, rng=None):
 
         total_swaps += 1
 
-        sc, casc_here = board.resolve_all_cascades(rng=refill_rng)
+        if recorder:
+            recorder.swap(a, b)
+
+        sc, casc_here = board.resolve_all_cascades(rng=game_rng, trace=recorder)
         # Rezolvam cascadele
 
+        if recorder:
+            recorder.end_move()
+
         total_score += sc
         total_cascades += casc_here
 
         if total_score >= target:
-            return {
+            result = {
                 'points': total_score,
                 'swaps': total_swaps,
                 'total_cascades': total_cascades,
@@ -517,6 +2993,23 @@ def play_single_game(rows=11, cols=11, target=10000, seed=None, rng=None):
                 'stopping_reason': 'REACHED_TARGET',
                 'moves_to_10000': moves_to_10000
             }
+            break
+
+    if table is not None:
+        result['tt_hits'] = table.hits
+        result['tt_misses'] = table.misses
+
+    if reshuffle:
+        result['reshuffles'] = reshuffles
+
+    if searcher is not None:
+        result['search_nodes'] = searcher.nodes
+        result['nodes_per_sec'] = round(searcher.nodes_per_sec)
+
+    if recorder:
+        result['trace'] = recorder.getvalue()
+
+    return result
 
 
 def ensure_dir(path):
@@ -528,6 +3021,642 @@ def ensure_dir(path):
         os.makedirs(d, exist_ok=True)
 
 
+def percentile(sorted_values, p):
+    # Percentila p (0..100) dintr-o lista deja sortata, cu interpolare liniara
+
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def parse_size(text):
+    # "21" -> (21, 21), "30x40" -> (30, 40)
+
+    rows, _, cols = text.lower().partition('x')
+
+    return int(rows), int(cols or rows)
+
+
+BOARD_FILE_MAGIC = b'CCBOARD1'
+# Fisierele binare cu table incep cu acest marcaj, urmat de rows si cols
+# (uint16 little-endian) si apoi de table, cate rows*cols octeti fiecare
+
+BOARD_FILE_HEADER = struct.Struct('<8sHH')
+
+
+def _check_board(grid, rows, cols, index, path):
+    # Verifica o tabla predefinita: dimensiuni rows x cols si valori 1..4
+
+    if len(grid) != rows or any(len(row) != cols for row in grid):
+        raise ValueError(f'{path}: tabla {index} nu are dimensiunea {rows}x{cols}')
+
+    if any(not (isinstance(v, int) and 1 <= v <= 4) for row in grid for v in row):
+        raise ValueError(f'{path}: tabla {index} contine valori in afara intervalului 1..4')
+
+
+def iter_json_boards(path, chunk_size=1 << 16):
+    """
+    Citeste lenes un fisier JSON de forma [tabla, tabla, ...] si intoarce
+    tablele pe rand, fara sa incarce tot fisierul in memorie.
+    """
+
+    decoder = json.JSONDecoder()
+
+    with open(path, encoding='utf-8') as fh:
+        buf, pos = '', 0
+
+        def more():
+            # Adauga urmatoarea bucata din fisier la buffer
+            nonlocal buf, pos
+            data = fh.read(chunk_size)
+            buf, pos = buf[pos:] + data, 0
+            return bool(data)
+
+        state = 'open'
+        # open: asteptam '[' / first: valoare sau ']' / value: valoare / sep: ',' sau ']'
+
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+
+            if pos == len(buf):
+                if more():
+                    continue
+                raise ValueError(f'{path}: fisier JSON incomplet')
+
+            ch = buf[pos]
+
+            if state == 'open':
+                if ch != '[':
+                    raise ValueError(f'{path}: se astepta o lista JSON de table')
+                pos += 1
+                state = 'first'
+            elif state in ('first', 'sep') and ch == ']':
+                return
+            elif state == 'sep':
+                if ch != ',':
+                    raise ValueError(f'{path}: JSON invalid la pozitia {pos}')
+                pos += 1
+                state = 'value'
+            else:
+                try:
+                    value, pos = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if more():
+                        # Tabla este taiata la capatul buffer-ului
+                        continue
+                    raise ValueError(f'{path}: JSON invalid la pozitia {pos}')
+                state = 'sep'
+                yield value
+
+
+def write_board_file(path, grids, rows, cols):
+    """
+    Scrie tablele in formatul binar compact (un octet pe celula), potrivit
+    pentru corpusuri de milioane de table. Intoarce numarul de table scrise.
+    """
+
+    ensure_dir(path)
+    count = 0
+
+    with open(path, 'wb') as fh:
+        fh.write(BOARD_FILE_HEADER.pack(BOARD_FILE_MAGIC, rows, cols))
+
+        for grid in grids:
+            _check_board(grid, rows, cols, count, path)
+            fh.write(bytes(v for row in grid for v in row))
+            count += 1
+
+    return count
+
+
+def iter_binary_boards(path, rows, cols):
+    # Citeste tablele dintr-un fisier binar mapat in memorie (vezi write_board_file)
+
+    with open(path, 'rb') as fh:
+        head = fh.read(BOARD_FILE_HEADER.size)
+
+        if len(head) < BOARD_FILE_HEADER.size:
+            raise ValueError(f'{path}: antet binar incomplet')
+
+        magic, file_rows, file_cols = BOARD_FILE_HEADER.unpack(head)
+
+        if (file_rows, file_cols) != (rows, cols):
+            raise ValueError(f'{path}: tablele sunt {file_rows}x{file_cols}, nu {rows}x{cols}')
+
+        size = os.fstat(fh.fileno()).st_size
+        body = size - BOARD_FILE_HEADER.size
+
+        if body % (rows * cols):
+            raise ValueError(f'{path}: fisier binar trunchiat')
+
+        if not body:
+            return
+
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for off in range(BOARD_FILE_HEADER.size, size, rows * cols):
+                grid = [list(mm[off + r * cols:off + (r + 1) * cols]) for r in range(rows)]
+                _check_board(grid, rows, cols, (off - BOARD_FILE_HEADER.size) // (rows * cols), path)
+                yield grid
+
+
+def iter_predefined_boards(path, rows, cols):
+    """
+    Intoarce pe rand tablele predefinite din path: format binar (dupa marcaj)
+    sau JSON. Fiecare tabla este verificata fata de rows x cols.
+    """
+
+    with open(path, 'rb') as fh:
+        binary = fh.read(len(BOARD_FILE_MAGIC)) == BOARD_FILE_MAGIC
+
+    if binary:
+        yield from iter_binary_boards(path, rows, cols)
+        return
+
+    for index, grid in enumerate(iter_json_boards(path)):
+        _check_board(grid, rows, cols, index, path)
+        yield grid
+
+
+RESULT_COLUMNS = ['game_id', 'points', 'swaps', 'total_cascades',
+                  'reached_target', 'stopping_reason', 'moves_to_10000']
+# Coloanele fisierului CSV de rezultate
+
+
+def result_columns(options):
+    # Coloanele CSV pentru un set de optiuni de joc
+    # (unele optiuni adauga coloane la finalul celor standard)
+
+    columns = list(RESULT_COLUMNS)
+
+    if options.get('tt_size'):
+        columns += ['tt_hits', 'tt_misses']
+
+    if options.get('reshuffle'):
+        columns += ['reshuffles']
+
+    if options.get('player', 'greedy') != 'greedy':
+        columns += ['search_nodes', 'nodes_per_sec']
+
+    if options.get('profile'):
+        columns += [f'{phase}_{unit}' for phase in PROFILE_PHASES for unit in ('calls', 'ns')]
+
+    return columns
+
+
+_WORKER_PROFILE = None
+# cProfile.Profile al procesului curent, creat la primul joc cu profile_dir
+
+
+def play_game_task(task):
+    """
+    Ruleaza un joc descris de tuplul (game_id, seed, optiuni) si intoarce
+    randul corespunzator din CSV. optiuni sunt argumentele pentru
+    play_single_game (rows, cols, target, engine, top_k, grid, tt_size, selection,
+    player, depth, beam, samples, move_time, reshuffle, trace, profile).
+    Cu trace, randul are la final si trace-ul jocului (bytes).
+    Cu optiunea profile_dir, fiecare proces ruleaza jocurile sub cProfile si
+    isi scrie statisticile cumulate in profile_dir/worker-<pid>.pstats.
+    Functia este la nivel de modul ca sa poata fi trimisa proceselor din pool.
+    """
+
+    global _WORKER_PROFILE
+
+    gid, game_seed, options = task
+    profile_dir = options.get('profile_dir')
+
+    if profile_dir:
+        options = {k: v for k, v in options.items() if k != 'profile_dir'}
+
+    if game_seed is not None:
+        random.seed(game_seed)
+        # Starea globala random depinde doar de seed-ul jocului,
+        # deci rezultatul nu depinde de procesul sau ordinea in care ruleaza
+
+    if profile_dir:
+        if _WORKER_PROFILE is None:
+            _WORKER_PROFILE = cProfile.Profile()
+
+        _WORKER_PROFILE.enable()
+        try:
+            result = play_single_game(seed=game_seed, **options)
+        finally:
+            _WORKER_PROFILE.disable()
+
+        _WORKER_PROFILE.dump_stats(os.path.join(profile_dir, f'worker-{os.getpid()}.pstats'))
+        # Rescriem fisierul dupa fiecare joc: procesele din pool nu au un "final" sigur
+    else:
+        result = play_single_game(seed=game_seed, **options)
+
+    row = [gid] + [result[name] for name in result_columns(options)[1:]]
+
+    if options.get('trace'):
+        row.append(result['trace'])
+        # Trace-ul merge ca ultim element, separat de coloanele CSV
+
+    return row
+
+
+def run_games(tasks, workers=1, chunksize=1):
+    """
+    Ruleaza jocurile si intoarce randurile in ordinea game_id.
+    Cu workers > 1 jocurile sunt distribuite pe un pool de procese;
+    imap pastreaza ordinea, deci rezultatul este identic cu rularea seriala.
+    Sarcinile sunt consumate pe loturi, ca un generator lenes de table
+    predefinite sa nu fie citit integral in memorie.
+    """
+
+    if workers <= 1:
+        for task in tasks:
+            yield play_game_task(task)
+        return
+
+    tasks = iter(tasks)
+    window = workers * chunksize * 16
+
+    with multiprocessing.Pool(workers) as pool:
+        while True:
+            batch = list(itertools.islice(tasks, window))
+
+            if not batch:
+                return
+
+            for row in pool.imap(play_game_task, batch, chunksize=chunksize):
+                yield row
+
+
+STOPPING_REASONS = ('NO_MOVES', 'REACHED_TARGET')
+# In formatele coloanare stopping_reason este salvat ca indice in aceasta lista
+
+RESULT_TYPES = {'reached_target': 'b', 'stopping_reason': 'b'}
+# Tipul (codul din modulul array) al fiecarei coloane; restul sunt int64 ('q').
+# moves_to_10000 gol ('') devine -1
+
+
+def encode_result(name, value):
+    # Valoarea unei coloane din rand -> intregul salvat in formatele coloanare
+
+    if name == 'stopping_reason':
+        return STOPPING_REASONS.index(value)
+
+    if value == '' or value is None:
+        return -1
+
+    return int(value)
+
+
+def decode_result(name, value):
+    # Inversul lui encode_result (valoarea asa cum apare in CSV)
+
+    if name == 'stopping_reason':
+        return STOPPING_REASONS[value]
+
+    if name == 'reached_target':
+        return bool(value)
+
+    if value == -1 and name == 'moves_to_10000':
+        return ''
+
+    return value
+
+
+class CsvResultWriter:
+    """
+    Scrie randurile de rezultate in CSV pe masura ce jocurile se termina.
+    Randurile sunt tinute intr-un buffer si scrise (plus flush pe disc)
+    la fiecare flush_every randuri, deci o intrerupere pierde cel mult
+    ultimul lot. Cu append=True continua un fisier existent.
+    """
+
+    def __init__(self, path, columns=RESULT_COLUMNS, flush_every=100, append=False):
+        self.flush_every = max(1, flush_every)
+        self.pending = []
+
+        self.fh = open(path, 'a' if append else 'w', newline='')
+        self.writer = csv.writer(self.fh)
+
+        if self.fh.tell() == 0:
+            # Fisier nou (sau gol): scriem antetul
+            self.writer.writerow(columns)
+
+    def write(self, row):
+        self.pending.append(row)
+
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.writer.writerows(self.pending)
+        self.pending.clear()
+        self.fh.flush()
+
+    def close(self):
+        self.flush()
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+COLUMNAR_MAGIC = b'CCRCOLS1'
+# Fisierul coloanar: marcaj, antet JSON (lungime uint32 + {"columns", "types"}),
+# apoi loturi: uint32 numarul de randuri, urmat de fiecare coloana ca array
+# little-endian de tipul ei. Un lot scris doar partial este ignorat la citire.
+
+COLUMNAR_HEADER = struct.Struct('<8sI')
+COLUMNAR_CHUNK = struct.Struct('<I')
+
+
+class ColumnarResultWriter:
+    """
+    Ca CsvResultWriter, dar scrie rezultatele pe coloane, intr-un format binar
+    simplu (vezi COLUMNAR_MAGIC): fiecare flush adauga un lot cu cate un
+    array tipizat pe coloana. Citirea inapoi (load_results) este o copiere
+    de octeti pe coloana, fara parsare de text.
+    """
+
+    def __init__(self, path, columns=RESULT_COLUMNS, flush_every=100, append=False):
+        self.columns = list(columns)
+        self.types = [RESULT_TYPES.get(name, 'q') for name in self.columns]
+        self.flush_every = max(1, flush_every)
+        self.pending = []
+
+        self.fh = open(path, 'ab' if append else 'wb')
+
+        if self.fh.tell() == 0:
+            header = json.dumps({'columns': self.columns, 'types': self.types}).encode()
+            self.fh.write(COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, len(header)) + header)
+
+    def write(self, row):
+        self.pending.append(row)
+
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            parts = [COLUMNAR_CHUNK.pack(len(self.pending))]
+
+            for j, (name, code) in enumerate(zip(self.columns, self.types)):
+                values = array.array(code, [encode_result(name, row[j]) for row in self.pending])
+                if sys.byteorder == 'big':
+                    values.byteswap()
+                parts.append(values.tobytes())
+
+            self.fh.write(b''.join(parts))
+            # Un singur write pe lot
+            self.pending.clear()
+
+        self.fh.flush()
+
+    def close(self):
+        self.flush()
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetResultWriter:
+    """
+    Scrie rezultatele intr-un fisier Parquet (necesita pyarrow), cate un
+    row group la fiecare flush_every randuri. Coloanele au aceleasi tipuri
+    si coduri ca in formatul coloanar. Parquet nu permite adaugarea la un
+    fisier existent, deci nu suporta append (--resume).
+    """
+
+    def __init__(self, path, columns=RESULT_COLUMNS, flush_every=100, append=False):
+        if pq is None:
+            raise ImportError('--out-format parquet necesita pachetul pyarrow')
+
+        if append:
+            raise ValueError('formatul parquet nu poate continua un fisier existent')
+
+        self.columns = list(columns)
+        self.flush_every = max(1, flush_every)
+        self.pending = []
+
+        types = {'b': pa.int8(), 'q': pa.int64()}
+        self.schema = pa.schema([(name, types[RESULT_TYPES.get(name, 'q')]) for name in self.columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, row):
+        self.pending.append(row)
+
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            data = [[encode_result(name, row[j]) for row in self.pending]
+                    for j, name in enumerate(self.columns)]
+            self.writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(data, self.schema)],
+                schema=self.schema))
+            self.pending.clear()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+RESULT_WRITERS = {
+    'csv': CsvResultWriter,
+    'columnar': ColumnarResultWriter,
+    'parquet': ParquetResultWriter,
+}
+# Formatele de iesire, selectabile cu --out-format
+
+RESULT_EXTENSIONS = {'csv': '.csv', 'columnar': '.ccr', 'parquet': '.parquet'}
+# Extensia implicita pentru --out, pe format
+
+
+def iter_columnar_chunks(path):
+    """
+    Citeste un fisier coloanar lot cu lot (prin mmap) si produce
+    (pozitia de dupa lot, {coloana: array}). Se opreste la primul lot
+    incomplet, deci un fisier intrerupt la scriere ramane citibil.
+    Intai produce (pozitia de dupa antet, None) pentru antet.
+    """
+
+    with open(path, 'rb') as fh:
+        head = fh.read(COLUMNAR_HEADER.size)
+
+        if len(head) < COLUMNAR_HEADER.size:
+            raise ValueError(f'{path}: fisier coloanar incomplet')
+
+        magic, size = COLUMNAR_HEADER.unpack(head)
+
+        if magic != COLUMNAR_MAGIC:
+            raise ValueError(f'{path}: nu este un fisier coloanar de rezultate')
+
+        header = json.loads(fh.read(size))
+        columns, types = header['columns'], header['types']
+        pos = COLUMNAR_HEADER.size + size
+        yield pos, columns
+
+        row_size = sum(array.array(code).itemsize for code in types)
+        end = fh.seek(0, os.SEEK_END)
+
+        if end == pos:
+            return
+
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while pos + COLUMNAR_CHUNK.size <= end:
+                n, = COLUMNAR_CHUNK.unpack_from(mm, pos)
+                stop = pos + COLUMNAR_CHUNK.size + n * row_size
+
+                if stop > end:
+                    break
+                    # Lot scris doar partial
+
+                chunk = {}
+                off = pos + COLUMNAR_CHUNK.size
+
+                for name, code in zip(columns, types):
+                    values = array.array(code)
+                    values.frombytes(mm[off:off + n * values.itemsize])
+                    if sys.byteorder == 'big':
+                        values.byteswap()
+                    chunk[name] = values
+                    off += n * values.itemsize
+
+                pos = stop
+                yield pos, chunk
+
+
+def load_results(path):
+    """
+    Incarca un fisier de rezultate (CSV, coloanar sau Parquet, dupa continut)
+    ca {coloana: array de intregi}, cu codificarea din encode_result
+    (stopping_reason = indice in STOPPING_REASONS, moves_to_10000 lipsa = -1).
+    Cu numpy, np.asarray(coloana) nu copiaza datele.
+    """
+
+    with open(path, 'rb') as fh:
+        magic = fh.read(len(COLUMNAR_MAGIC))
+
+    if magic == COLUMNAR_MAGIC:
+        chunks = iter_columnar_chunks(path)
+        _, columns = next(chunks)
+        result = {name: array.array(RESULT_TYPES.get(name, 'q')) for name in columns}
+
+        for _, chunk in chunks:
+            for name, values in chunk.items():
+                result[name].extend(values)
+
+        return result
+
+    if magic.startswith(b'PAR1'):
+        if pq is None:
+            raise ImportError('citirea fisierelor parquet necesita pachetul pyarrow')
+
+        table = pq.read_table(path)
+
+        return {name: array.array(RESULT_TYPES.get(name, 'q'), table.column(name).to_pylist())
+                for name in table.column_names}
+
+    with open(path, newline='') as fh:
+        reader = csv.reader(fh)
+        columns = next(reader)
+        result = {name: array.array(RESULT_TYPES.get(name, 'q')) for name in columns}
+
+        for row in reader:
+            for name, value in zip(columns, row):
+                if name == 'reached_target':
+                    value = value == 'True'
+                result[name].append(encode_result(name, value))
+
+    return result
+
+
+def resume_columnar(path, columns=RESULT_COLUMNS):
+    """
+    Ca resume_csv, pentru formatul coloanar: taie un eventual lot incomplet
+    de la final si intoarce setul de game_id deja terminate.
+    """
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+
+    done = set()
+    chunks = iter_columnar_chunks(path)
+    pos, header = next(chunks)
+
+    if header != list(columns):
+        raise ValueError(f'{path}: coloanele {header} nu corespund coloanelor {list(columns)}')
+
+    for pos, chunk in chunks:
+        done.update(chunk['game_id'])
+
+    chunks.close()
+
+    if pos < os.path.getsize(path):
+        with open(path, 'rb+') as fh:
+            fh.truncate(pos)
+
+    return done
+
+
+def resume_csv(path, columns=RESULT_COLUMNS):
+    """
+    Pregateste un CSV partial pentru continuare: taie un eventual ultim rand
+    scris doar pe jumatate si intoarce setul de game_id deja terminate.
+    """
+
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, 'rb+') as fh:
+        size = fh.seek(0, os.SEEK_END)
+        pos = size
+
+        while pos > 0:
+            # Cautam ultimul '\n' citind fisierul de la coada, pe bucati
+            start = max(0, pos - 65536)
+            fh.seek(start)
+            nl = fh.read(pos - start).rfind(b'\n')
+            if nl >= 0:
+                pos = start + nl + 1
+                break
+            pos = start
+
+        if pos < size:
+            fh.truncate(pos)
+
+    done = set()
+
+    with open(path, newline='') as fh:
+        reader = csv.reader(fh)
+        header = next(reader, None)
+
+        if header is not None and header != columns:
+            raise ValueError(f'{path}: antetul {header} nu corespunde coloanelor {columns}')
+
+        for row in reader:
+            if len(row) == len(columns):
+                done.add(int(row[0]))
+
+    return done
+
+
 def main():
     # Functia principala
 
@@ -538,27 +3667,185 @@ def main():
     parser.add_argument('--rows', type=int, default=11)
     parser.add_argument('--cols', type=int, default=11)
     parser.add_argument('--target', type=int, default=10000)
-    parser.add_argument('--out', type=str, default='results/summary.csv')
+    parser.add_argument('--out', type=str, default=None,
+                        help='fisierul de rezultate (implicit results/summary + extensia formatului)')
+    parser.add_argument('--out-format', choices=sorted(RESULT_WRITERS), default='csv',
+                        help='csv, columnar (binar pe coloane, fara dependinte) sau parquet (pyarrow)')
     parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='numar de procese paralele (0 = toate nucleele)')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='python',
+                        help='implementarea tablei (numpy necesita pachetul numpy; bitboard nu are dependente)')
+    parser.add_argument('--top-k', type=int, default=None,
+                        help='simuleaza complet doar cei mai buni K candidati dupa scorul imediat')
+    parser.add_argument('--input_predefined', action='store_true',
+                        help='joaca tablele initiale din --input_file in loc de table random')
+    parser.add_argument('--input_file', type=str, default='data/predefined_games.json',
+                        help='fisier cu table predefinite (JSON sau binar, vezi write_board_file)')
+    parser.add_argument('--selection', choices=sorted(SELECTIONS), default='greedy',
+                        help='selectia formatiilor: greedy sau optimal (scor maxim exact)')
+    parser.add_argument('--tt-size', type=int, default=0,
+                        help='marimea cache-ului de transpozitii pentru simulari (0 = dezactivat; '
+                             'doar cu --player beam sau expectimax)')
+    parser.add_argument('--flush-every', type=int, default=100,
+                        help='scrie rezultatele pe disc la fiecare N jocuri terminate')
+    parser.add_argument('--resume', action='store_true',
+                        help='continua un --out partial, sarind jocurile deja scrise')
+    parser.add_argument('--player', choices=['greedy', 'beam', 'expectimax'], default='greedy',
+                        help='greedy = cea mai buna mutare imediata; beam / expectimax = cautare pe --depth mutari')
+    parser.add_argument('--depth', type=int, default=2,
+                        help='adancimea maxima a cautarii (pentru --player beam/expectimax)')
+    parser.add_argument('--beam', type=int, default=8,
+                        help='cate stari pastreaza cautarea pe fiecare nivel')
+    parser.add_argument('--samples', type=int, default=4,
+                        help='refill-uri esantionate pe care mediaza --player expectimax')
+    parser.add_argument('--profile', action='store_true',
+                        help='adauga la rezultate apelurile si timpul (ns) pe faze, plus totalul la final')
+    parser.add_argument('--profile-dir', type=str, default=None,
+                        help='scrie si cate un fisier cProfile/pstats pe proces in acest director')
+    parser.add_argument('--trace-out', type=str, default=None,
+                        help='inregistreaza fiecare joc (swap-uri, cascade, refill) in acest fisier binar')
+    parser.add_argument('--reshuffle', type=int, default=0,
+                        help='de cate ori se amesteca o tabla fara mutari inainte de NO_MOVES')
+    parser.add_argument('--move-time', type=float, default=None,
+                        help='buget de timp pe mutare in secunde (adancire iterativa pana la --depth)')
 
     args = parser.parse_args()
 
-    ensure_dir(args.out)
-    random.seed(args.seed)
+    if args.tt_size and args.player == 'greedy':
+        parser.error('--tt-size are efect doar cu --player beam sau expectimax '
+                     '(jucatorul greedy nu repeta nicio simulare)')
+
+    if args.top_k is not None and args.top_k < 1:
+        parser.error('--top-k trebuie sa fie cel putin 1')
+
+    if args.engine == 'numpy' and np is None:
+        parser.error('--engine numpy necesita pachetul numpy (pip install numpy)')
 
-    records = []
+    if args.out_format == 'parquet' and pq is None:
+        parser.error('--out-format parquet necesita pachetul pyarrow (pip install pyarrow)')
 
-    for gid in range(args.games):
-        game_seed = args.seed + gid if args.seed is not None else None
-        result = play_single_game(args.rows, args.cols, args.target, seed=game_seed)
-        records.append([gid, result['points'], result['swaps'], result['total_cascades'],
-                        result['reached_target'], result['stopping_reason'], result['moves_to_10000']])
+    if args.out_format == 'parquet' and args.resume:
+        parser.error('--resume nu este suportat pentru --out-format parquet')
+
+    if args.out is None:
+        args.out = 'results/summary' + RESULT_EXTENSIONS[args.out_format]
+
+    ensure_dir(args.out)
+    random.seed(args.seed)
 
-    with open(args.out, 'w', newline='') as fh:
-        writer = csv.writer(fh)
-        writer.writerow(['game_id', 'points', 'swaps', 'total_cascades',
-                         'reached_target', 'stopping_reason', 'moves_to_10000'])
-        writer.writerows(records)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    # 0 inseamna cate un proces pe nucleu
+
+    options = dict(rows=args.rows, cols=args.cols, target=args.target, engine=args.engine,
+                   top_k=args.top_k, tt_size=args.tt_size, selection=args.selection,
+                   player=args.player, depth=args.depth, beam=args.beam, samples=args.samples,
+                   move_time=args.move_time, reshuffle=args.reshuffle, trace=args.trace_out is not None,
+                   profile=args.profile)
+    # Argumentele comune pentru play_single_game
+
+    columns = result_columns(options)
+
+    if args.profile_dir:
+        os.makedirs(args.profile_dir, exist_ok=True)
+        options['profile_dir'] = args.profile_dir
+        # Nu schimba coloanele: doar play_game_task o foloseste
+
+    done = set()
+
+    if args.resume:
+        try:
+            resume = resume_columnar if args.out_format == 'columnar' else resume_csv
+            done = resume(args.out, columns)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.input_predefined:
+        if not os.path.exists(args.input_file):
+            parser.error(f'--input_file {args.input_file} nu exista')
+        try:
+            for _ in zip(range(args.games), iter_predefined_boards(args.input_file, args.rows, args.cols)):
+                pass
+        except ValueError as e:
+            parser.error(str(e))
+        # Verificam toate tablele care vor fi jucate inainte ca writer-ul sa
+        # deschida (si sa goleasca) --out: o tabla gresita opreste rularea cu
+        # un mesaj clar, fara un fisier de rezultate partial. Doar citire,
+        # fara sa pastram tablele in memorie
+
+        grids = iter_predefined_boards(args.input_file, args.rows, args.cols)
+        # Cel mult --games table, citite lenes din fisier
+    else:
+        grids = itertools.repeat(None)
+        # Table generate random
+
+    tasks = ((gid, args.seed + gid if args.seed is not None else None, dict(options, grid=grid))
+             for gid, grid in zip(range(args.games), grids) if gid not in done)
+    # Fiecare joc primeste seed-ul determinist args.seed + gid
+
+    chunksize = max(1, args.games // (workers * 8))
+    # Bucati suficient de mari cat sa nu platim IPC pe fiecare joc,
+    # dar destul de mici cat sa echilibram procesele
+
+    trace_fh = None
+
+    if args.trace_out:
+        ensure_dir(args.trace_out)
+
+        if args.resume:
+            try:
+                resume_trace(args.trace_out, done)
+            except ValueError as e:
+                parser.error(str(e))
+
+        trace_fh = open(args.trace_out, 'ab' if args.resume else 'wb')
+
+    traces = []
+    # Trace-urile lotului curent de rezultate, scrise impreuna cu lotul
+
+    def flush_traces():
+        # Trace-urile ajung pe disc inaintea randurilor lor de rezultate:
+        # dupa o intrerupere, resume_trace sterge trace-urile fara rezultat
+        for gid, data in traces:
+            write_trace_record(trace_fh, gid, data)
+        traces.clear()
+        trace_fh.flush()
+
+    profiled = [i for i, name in enumerate(columns) if name.endswith(('_calls', '_ns'))
+                if name.rsplit('_', 1)[0] in PROFILE_PHASES]
+    totals = [0] * len(profiled)
+    # Totalurile pe faze, adunate peste toate jocurile (din toate procesele)
+
+    with RESULT_WRITERS[args.out_format](args.out, columns, args.flush_every, append=args.resume) as writer:
+        try:
+            for row in run_games(tasks, workers, chunksize):
+                if trace_fh:
+                    traces.append((row[0], row.pop()))
+
+                    if len(writer.pending) + 1 >= writer.flush_every:
+                        flush_traces()
+                        # Randul acesta completeaza lotul, care se scrie imediat
+
+                writer.write(row)
+                # Rezultatele ajung pe disc pe masura ce jocurile se termina
+
+                for k, i in enumerate(profiled):
+                    totals[k] += row[i]
+        finally:
+            if trace_fh:
+                flush_traces()
+                # Si ultimul lot (writer-ul il scrie la inchidere)
+
+    if trace_fh:
+        trace_fh.close()
+
+    if args.profile:
+        total = dict(zip((columns[i] for i in profiled), totals))
+
+        for phase in PROFILE_PHASES:
+            calls, ns = total[f'{phase}_calls'], total[f'{phase}_ns']
+            per_call = ns / calls / 1e3 if calls else 0.0
+            print(f'{phase:26s} {calls:12d} apeluri {ns / 1e9:10.3f} s {per_call:10.1f} us/apel')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+# Serviciu local "cel mai bun swap pentru tabla asta" peste play_candycrush.py:
+# cereri si raspunsuri JSON, cate unul pe linie, prin stdin/stdout sau printr-un socket Unix
+
+import argparse
+# Modul pentru argumentele din linia de comanda
+
+import asyncio
+# Bucla de evenimente: multe cereri concurente intr-un singur proces
+
+import json
+# Protocolul: un obiect JSON pe linie
+
+import os
+# Numarul de nuclee si stergerea socket-ului vechi
+
+import random
+# Tablele random ale clientului de proba
+
+import signal
+# SIGTERM opreste serverul curat (socket sters, pool inchis)
+
+import stat
+# Verificam ca fisierul de la calea socket-ului este chiar un socket
+
+import sys
+# stdin / stdout si interpretorul pentru serverul pornit de client
+
+import time
+# Masurarea latentei (perf_counter)
+
+from collections import deque
+# Ultimele latente, pentru percentile
+
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+# Procesele care ruleaza cautarile
+
+from play_candycrush import ENGINES, Board, RefillStream, parse_size, percentile
+
+
+# Protocolul (cate o linie JSON pe cerere, raspunsurile pot veni in alta ordine,
+# dupa "id"):
+#   {"id": 1, "grid": [[1, 2, ...], ...], "engine": "python", "top_k": null,
+#    "seed": 0, "timeout": 5}
+#   -> {"id": 1, "swap": [[r, c], [r2, c2]], "points": 45, "cascades": 2, "ms": 12.3}
+#      ("swap": null daca nu exista nicio mutare, "error": "..." la cereri invalide sau timeout)
+#   {"id": 2, "op": "stats"}
+#   -> {"id": 2, "requests": ..., "p50_ms": ..., "p99_ms": ..., "queue_depth": ..., ...}
+# Doar "grid" este obligatoriu; seed fixeaza refill-ul simularilor (RefillStream),
+# deci aceeasi cerere primeste mereu acelasi raspuns.
+
+MAX_SIDE = 64
+# Cele mai multe randuri / coloane acceptate: o cautare costa cam (rows * cols)^2,
+# deci o singura tabla uriasa ar tine ocupat un proces din pool minute in sir
+
+
+def is_int(value):
+    # Intreg JSON: true / false sunt si ele int in Python, dar nu sunt acceptate
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_request(request, default_timeout):
+    # Valideaza o cerere decodata; intoarce (op, sarcina pentru pool, timeout)
+    # sau ridica ValueError cu un mesaj pentru client
+
+    if not isinstance(request, dict):
+        raise ValueError('cererea trebuie sa fie un obiect JSON')
+
+    op = request.get('op', 'best')
+
+    if op == 'stats':
+        return op, None, None
+
+    if op != 'best':
+        raise ValueError(f'op necunoscut: {op!r}')
+
+    grid = request.get('grid')
+
+    if (not isinstance(grid, list) or not grid or not all(isinstance(row, list) for row in grid)
+            or not grid[0] or any(len(row) != len(grid[0]) for row in grid)):
+        raise ValueError('grid trebuie sa fie o matrice nevida rows x cols')
+
+    if len(grid) > MAX_SIDE or len(grid[0]) > MAX_SIDE:
+        raise ValueError(f'grid are cel mult {MAX_SIDE} x {MAX_SIDE} celule')
+
+    if any(not is_int(v) or not 1 <= v <= 4 for row in grid for v in row):
+        raise ValueError('grid contine valori in afara intervalului 1..4')
+
+    engine = request.get('engine', 'python')
+
+    if engine not in ENGINES:
+        raise ValueError(f'engine necunoscut: {engine!r}')
+
+    task = {'grid': grid, 'engine': engine}
+
+    for key in ('top_k', 'seed'):
+        value = request.get(key)
+        if value is not None and not is_int(value):
+            raise ValueError(f'{key} trebuie sa fie intreg')
+        task[key] = value
+
+    if task['top_k'] is not None and task['top_k'] < 1:
+        raise ValueError('top_k trebuie sa fie cel putin 1')
+
+    timeout = request.get('timeout', default_timeout)
+
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+        raise ValueError('timeout trebuie sa fie un numar pozitiv de secunde')
+
+    return op, task, timeout
+
+
+def solve(task):
+    # Cel mai bun swap pentru o sarcina validata (ruleaza in procesele din pool)
+
+    grid = task['grid']
+    board = ENGINES[task['engine']](len(grid), len(grid[0]), grid=grid)
+    best = board.find_best_swap(top_k=task['top_k'], stream=RefillStream(task['seed'] or 0))
+
+    if best is None:
+        return {'swap': None}
+
+    a, b, points, cascades = best
+
+    return {'swap': [list(a), list(b)], 'points': points, 'cascades': cascades}
+
+
+def solve_batch(tasks):
+    # Un lot de sarcini intr-un singur drum pana la pool; o eroare strica doar cererea ei
+
+    results = []
+
+    for task in tasks:
+        try:
+            results.append(solve(task))
+        except Exception as exc:
+            results.append({'error': f'{type(exc).__name__}: {exc}'})
+
+    return results
+
+
+def warm_worker(sizes, engine):
+    # Initializarea fiecarui proces din pool: importurile, cheile Zobrist,
+    # tabelele pe dimensiune si o cautare de proba, inainte de prima cerere
+
+    rng = random.Random(0)
+
+    for rows, cols in sizes:
+        grid = [[rng.randint(1, 4) for _ in range(cols)] for _ in range(rows)]
+        ENGINES[engine](rows, cols, grid=grid).find_best_swap(stream=RefillStream(0))
+
+
+def ping():
+    # Sarcina goala: porneste (si incalzeste) un proces din pool
+    return os.getpid()
+
+
+class BestMoveService:
+    """
+    Cererile intra intr-o coada asyncio; dispecerul asteapta un proces liber si
+    ii trimite tot ce s-a strans intre timp in coada (cel mult batch_size
+    cereri), deci sub sarcina cererile merg in loturi, iar cand un proces e
+    liber o cerere pleaca imediat, fara asteptare.
+    Fiecare proces este un ProcessPoolExecutor separat, cu un singur proces,
+    ca sa poata fi oprit singur. Fiecare cerere are un timeout: la expirare
+    clientul primeste eroare (o cerere expirata inca din coada nu mai ajunge
+    la un proces), iar un lot care depaseste termenul ultimei sale cereri
+    are procesul oprit si inlocuit cu unul nou, deci nu ramane blocat in
+    lucru si nu tine ocupat locul altor cereri.
+    """
+
+    def __init__(self, workers=None, batch_size=8, timeout=5.0, warm=((11, 11),), engine='python',
+                 history=10000):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.warm = (tuple(warm), engine)
+
+        self.pools = [self._new_pool() for _ in range(self.workers)]
+        # Procesele pornite (inclusiv cele in lucru), pentru close()
+
+        self.queue = None
+        self.free = None
+        self.dispatcher = None
+        # Create in start(), in bucla de evenimente
+
+        self.latencies = deque(maxlen=history)
+        # Latentele ultimelor cereri (ms), de la primire pana la raspuns
+        self.requests = self.errors = self.timeouts = self.batches = self.in_flight = self.recycled = 0
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(1, initializer=warm_worker, initargs=self.warm)
+
+    async def start(self):
+        # Porneste si incalzeste toate procesele, apoi dispecerul
+
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.free = asyncio.Queue()
+        # Procesele libere: cate un lot in lucru pe proces; restul asteapta in coada (queue_depth)
+
+        await asyncio.gather(*(loop.run_in_executor(pool, ping) for pool in self.pools))
+
+        for pool in self.pools:
+            self.free.put_nowait(pool)
+
+        self.dispatcher = asyncio.create_task(self._dispatch())
+
+    async def close(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+        for pool in self.pools:
+            pool.shutdown(cancel_futures=True)
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self.queue.get()]
+            pool = await self.free.get()
+
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                # Tot ce s-a adunat cat am asteptat un proces liber
+
+            batch = [job for job in batch if not job[1].done()]
+            # Cererile expirate in coada nu mai ajung la un proces
+
+            if not batch:
+                self.free.put_nowait(pool)
+                continue
+
+            asyncio.create_task(self._run(batch, pool))
+
+    async def _run(self, batch, pool):
+        loop = asyncio.get_running_loop()
+        self.in_flight += len(batch)
+        self.batches += 1
+        deadline = max(job[2] for job in batch)
+        # Dupa termenul ultimei cereri nimeni nu mai asteapta rezultatul
+
+        try:
+            work = asyncio.wrap_future(pool.submit(solve_batch, [job[0] for job in batch]))
+            results = await asyncio.wait_for(work, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            results = [{'error': 'timeout'}] * len(batch)
+            pool = await self._recycle(pool)
+        except Exception as exc:
+            # De ex. procesul a murit: executorul ramane stricat, deci il inlocuim
+            results = [{'error': f'{type(exc).__name__}: {exc}'}] * len(batch)
+            if isinstance(exc, BrokenExecutor):
+                pool = await self._recycle(pool)
+        finally:
+            self.in_flight -= len(batch)
+
+        self.free.put_nowait(pool)
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _recycle(self, pool):
+        # Opreste procesul blocat pe un lot expirat si intoarce un proces nou, incalzit
+
+        self.recycled += 1
+
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+            # Executorul nu poate anula o sarcina pornita; oprim procesul
+
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.pools.remove(pool)
+
+        fresh = self._new_pool()
+        self.pools.append(fresh)
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(fresh, ping)
+        except Exception:
+            pass
+            # Un proces care nu porneste da erori la lotul urmator, nu aici
+
+        return fresh
+
+    async def handle(self, line):
+        # Raspunsul (dict) pentru o linie primita de la client
+
+        t0 = time.perf_counter()
+        self.requests += 1
+        rid = None
+
+        try:
+            request = json.loads(line)
+            rid = request.get('id') if isinstance(request, dict) else None
+            op, task, timeout = parse_request(request, self.timeout)
+        except ValueError as exc:
+            # json.JSONDecodeError este tot un ValueError
+            self.errors += 1
+            return {'id': rid, 'error': str(exc)}
+
+        if op == 'stats':
+            return {'id': rid, **self.stats()}
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.put_nowait((task, future, loop.time() + timeout))
+
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            result = {'error': 'timeout'}
+
+        if 'error' in result and result['error'] != 'timeout':
+            self.errors += 1
+
+        ms = (time.perf_counter() - t0) * 1000
+        self.latencies.append(ms)
+
+        return {'id': rid, **result, 'ms': round(ms, 3)}
+
+    def stats(self):
+        # Contoarele serviciului si percentilele latentei (ultimele history cereri)
+
+        latencies = sorted(self.latencies)
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'recycled': self.recycled,
+            'batches': self.batches,
+            'queue_depth': self.queue.qsize(),
+            'in_flight': self.in_flight,
+            'workers': self.workers,
+            'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 3) if latencies else None,
+        }
+
+
+async def answer_lines(service, readline, write):
+    # Citeste linii cu readline() pana la EOF si trimite raspunsurile cu write(text)
+    # pe masura ce sunt gata (cererile se rezolva concurent)
+
+    pending = set()
+
+    async def answer(line):
+        write(json.dumps(await service.handle(line)) + '\n')
+
+    while True:
+        line = await readline()
+
+        if not line:
+            break
+
+        if line.strip():
+            task = asyncio.create_task(answer(line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.wait(pending)
+
+
+async def serve_stdio(service):
+    # Cereri din stdin, raspunsuri in stdout; se opreste la EOF dupa ultimele raspunsuri
+
+    loop = asyncio.get_running_loop()
+
+    def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    async def readline():
+        return await loop.run_in_executor(None, sys.stdin.readline)
+        # Un fir separat: merge si cu pipe-uri, si cu fisiere redirectate
+
+    await answer_lines(service, readline, write)
+
+
+async def serve_unix(service, path):
+    # Server pe socket Unix: fiecare conexiune trimite linii si primeste raspunsuri
+
+    async def connection(reader, writer):
+        await answer_lines(service, reader.readline, lambda text: writer.write(text.encode()))
+        await writer.drain()
+        writer.close()
+
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+        # Socket ramas de la o rulare anterioara
+
+    server = await asyncio.start_unix_server(connection, path)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+class Client:
+    """
+    Client local pentru serviciu, peste un socket Unix (connect) sau peste
+    stdin/stdout-ul unui server pornit ca subproces (spawn, complet offline).
+    Cererile pot fi trimise concurent; raspunsurile sunt potrivite dupa id.
+    """
+
+    def __init__(self, reader, writer, process=None):
+        self.reader, self.writer, self.process = reader, writer, process
+        self.next_id = 0
+        self.waiting = {}
+        self.receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, path):
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    @classmethod
+    async def spawn(cls, *args):
+        # Porneste serverul (stdin/stdout) ca subproces, cu argumentele date
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), *args,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE)
+        return cls(process.stdout, process.stdin, process)
+
+    async def _receive(self):
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            future = self.waiting.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+
+    async def call(self, **request):
+        self.next_id += 1
+        request['id'] = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[self.next_id] = future
+        self.writer.write((json.dumps(request) + '\n').encode())
+        await self.writer.drain()
+        return await future
+
+    async def best_swap(self, grid, **options):
+        return await self.call(grid=grid, **options)
+
+    async def stats(self):
+        return await self.call(op='stats')
+
+    async def close(self):
+        self.writer.close()
+        if self.process is not None:
+            await self.process.wait()
+            # Serverul pe stdio se opreste singur la EOF
+        self.receiver.cancel()
+
+
+async def run_client(args):
+    # Trimite args.client table random (reproductibile din --seed), cate
+    # args.concurrency odata, si afiseaza latentele vazute de client si statisticile serverului
+
+    if args.socket:
+        client = await Client.connect(args.socket)
+    else:
+        client = await Client.spawn('--workers', str(args.workers or 0), '--batch-size', str(args.batch_size),
+                                    '--warm', f'{args.rows}x{args.cols}')
+
+    rng = random.Random(args.seed)
+    grids = []
+
+    for _ in range(args.client):
+        board = Board(args.rows, args.cols, grid=[[rng.randint(1, 4) for _ in range(args.cols)]
+                                                 for _ in range(args.rows)])
+        board.resolve_all_cascades(rng)
+        grids.append(board.to_rows())
+        # Table stabile, ca in joc
+
+    gate = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(grid):
+        async with gate:
+            t0 = time.perf_counter()
+            response = await client.best_swap(grid, seed=args.seed, timeout=args.timeout)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            return response
+
+    t0 = time.perf_counter()
+    responses = await asyncio.gather(*(one(g) for g in grids))
+    seconds = time.perf_counter() - t0
+
+    stats = await client.stats()
+    await client.close()
+
+    latencies.sort()
+    failed = sum(1 for r in responses if 'error' in r)
+    print(f'{len(responses)} cereri in {seconds:.2f} s ({len(responses) / seconds:.1f}/s), erori {failed}, '
+          f'client p50 {percentile(latencies, 50):.1f} ms, p99 {percentile(latencies, 99):.1f} ms')
+    print('server', json.dumps(stats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serviciu local pentru cel mai bun swap (JSON pe linii)')
+
+    parser.add_argument('--socket', type=str, default=None,
+                        help='cale socket Unix (implicit: stdin/stdout)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='procese in pool (implicit / 0: toate nucleele)')
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help='cele mai multe cereri trimise odata unui proces')
+    parser.add_argument('--timeout', type=float, default=5.0,
+                        help='timeout implicit pe cerere, in secunde')
+    parser.add_argument('--warm', nargs='+', type=parse_size, default=[(11, 11)],
+                        help='dimensiuni de tabla pregatite in fiecare proces la pornire, de ex. 11 21x21')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='python',
+                        help='engine-ul folosit la incalzirea pool-ului')
+    parser.add_argument('--client', type=int, default=0, metavar='N',
+                        help='mod client: trimite N table random (la --socket sau unui server pornit local)')
+    parser.add_argument('--concurrency', type=int, default=16, help='cereri in zbor in modul client')
+    parser.add_argument('--rows', type=int, default=11)
+    parser.add_argument('--cols', type=int, default=11)
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.client:
+        asyncio.run(run_client(args))
+        return
+
+    async def serve():
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass
+            # Windows: doar Ctrl+C
+
+        service = BestMoveService(args.workers, args.batch_size, args.timeout, args.warm, args.engine)
+        await service.start()
+
+        try:
+            if args.socket:
+                await serve_unix(service, args.socket)
+            else:
+                await serve_stdio(service)
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import random
+
+from play_candycrush import Board, RefillStream
+
+
+def cascade_steps(board, stream, steps):
+    # Joaca swap-uri si cascade si intoarce (tabla, coloane schimbate)
+    # dupa fiecare refill, pana la steps pasi
+
+    move = 0
+
+    while steps > 0:
+        candidates = board.candidate_swaps()
+
+        if not candidates:
+            return
+
+        a, b = candidates[move % len(candidates)]
+        board.swap(a, b)
+        sub = stream.child(move)
+        cascade = 0
+        dirty = None
+
+        while True:
+            forms = board.detect_formations(dirty)
+
+            if not forms:
+                break
+
+            board.apply_eliminations(board.select(forms))
+            board.apply_gravity_and_refill(rng=sub.child(cascade))
+            cascade += 1
+            dirty = board.dirty_cols
+            yield board, dirty
+            steps -= 1
+
+        move += 1
+
+
+def test_dirty_scan_matches_full_scan():
+    # Scanarea zonei schimbate gaseste exact formatiile scanarii complete,
+    # in aceeasi ordine, dupa fiecare pas de cascada
+
+    checked = 0
+
+    for seed, (rows, cols) in enumerate([(11, 11), (9, 9), (7, 12), (12, 6)]):
+        random.seed(seed)
+        board = Board(rows, cols)
+        board.resolve_all_cascades(rng=RefillStream(seed, -1))
+
+        for board, dirty in cascade_steps(board, RefillStream(seed), 300):
+            partial = [(f.mask, f.type) for f in board.detect_formations(dirty)]
+            full = [(f.mask, f.type) for f in board.detect_formations()]
+            assert partial == full
+            checked += 1
+
+    assert checked >= 1200
+
+
+def rescanned_swaps(board):
+    # Swap-urile care formeaza ceva, verificate de la zero pe o copie
+    fresh = board.copy()
+    return [(a, b) for a, b in fresh.adjacent_swaps() if fresh.swap_creates_formation(a, b)]
+
+
+def test_move_index_matches_full_rescan():
+    # Indexul de mutari, actualizat doar in jurul celulelor scrise, ramane egal
+    # cu o verificare completa dupa swap-uri, cascade, undo si reshuffle
+
+    rng = random.Random(0)
+
+    for seed in range(6):
+        random.seed(seed)
+        board = Board(rng.randint(5, 11), rng.randint(5, 11))
+        board.resolve_all_cascades(rng=RefillStream(seed, -1))
+
+        for step in range(60):
+            candidates = board.candidate_swaps()
+            assert sorted(candidates) == sorted(rescanned_swaps(board))
+
+            action = rng.random()
+
+            if not candidates or action < 0.15:
+                before = board.copy()
+                if not board.reshuffle(rng):
+                    # O amestecare esuata lasa tabla neschimbata
+                    assert bytes(board.flat) == bytes(before.flat)
+                continue
+
+            a, b = rng.choice(candidates)
+
+            if action < 0.5:
+                point = board.mark()
+                board.swap(a, b)
+                board.resolve_all_cascades(rng=RefillStream(seed, step))
+                board.candidate_swaps()
+                # Indexul se actualizeaza si pe starea temporara
+                board.undo(point)
+            else:
+                board.swap(a, b)
+                board.resolve_all_cascades(rng=RefillStream(seed, step))
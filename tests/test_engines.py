@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from play_candycrush import ENGINES, RefillStream, np, play_single_game
+
+OTHER_ENGINES = [pytest.param('numpy', marks=pytest.mark.skipif(np is None, reason='numpy nu este instalat')),
+                 'bitboard']
+# Engine-urile comparate cu Board (python)
+
+SEEDS = [0, 1, 2, 3, 4]
+SIZES = [(11, 11), (9, 9), (7, 12)]
+
+
+def make_board(engine, seed, rows, cols):
+    # Aceeasi tabla initiala pentru fiecare engine (generata din random global)
+    random.seed(seed)
+    return ENGINES[engine](rows, cols)
+
+
+def cells(board):
+    # Tabla ca lista de randuri, independent de reprezentarea interna
+    return [[board.cell(r, c) for c in range(board.cols)] for r in range(board.rows)]
+
+
+def formations(board, dirty=None):
+    return [(f.mask, f.type, f.score, f.size) for f in board.detect_formations(dirty)]
+
+
+def swaps(board):
+    return [tuple(map(tuple, swap)) for swap in board.candidate_swaps()]
+
+
+@pytest.mark.parametrize('engine', OTHER_ENGINES)
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('rows, cols', SIZES)
+def test_board_steps_match_python(engine, seed, rows, cols):
+    # Detectare (masti si ordine), cascade, hash si swap-uri candidate,
+    # pas cu pas, identice cu Board
+
+    ref = make_board('python', seed, rows, cols)
+    other = make_board(engine, seed, rows, cols)
+    assert other.hash == ref.hash
+    assert formations(other) == formations(ref)
+
+    stream = RefillStream(seed)
+    assert other.resolve_all_cascades(rng=stream.child(-1)) == ref.resolve_all_cascades(rng=stream.child(-1))
+    assert cells(other) == cells(ref)
+    assert other.hash == ref.hash
+
+    for move in range(20):
+        candidates = swaps(ref)
+        assert swaps(other) == candidates
+
+        if not candidates:
+            break
+
+        a, b = candidates[(seed + move) % len(candidates)]
+        ref.swap(a, b)
+        other.swap(a, b)
+        assert other.hash == ref.hash
+        assert formations(other) == formations(ref)
+
+        sub = stream.child(move)
+        assert other.resolve_all_cascades(rng=sub) == ref.resolve_all_cascades(rng=sub)
+        assert cells(other) == cells(ref)
+        assert other.hash == ref.hash == ref.compute_hash()
+
+
+@pytest.mark.parametrize('engine', OTHER_ENGINES)
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('options', [{}, {'top_k': 5}])
+def test_games_match_python(engine, seed, options):
+    # Jocuri scurte cu acelasi seed dau acelasi rezultat pe orice engine,
+    # si cu cautarea aproximativa top_k
+
+    random.seed(seed)
+    expected = play_single_game(9, 9, target=1500, seed=seed, **options)
+    random.seed(seed)
+    assert play_single_game(9, 9, target=1500, seed=seed, engine=engine, **options) == expected
+
+
+@pytest.mark.parametrize('engine', ['python'] + OTHER_ENGINES)
+def test_profile_times_candidate_swaps(engine):
+    # Fiecare engine trece prin faza candidate_swaps la fiecare find_best_swap,
+    # iar profilarea nu schimba jocul
+
+    random.seed(2)
+    expected = play_single_game(9, 9, target=1500, seed=2, engine=engine)
+    random.seed(2)
+    result = play_single_game(9, 9, target=1500, seed=2, engine=engine, profile=True)
+
+    assert result['find_best_swap_calls'] > 0
+    assert result['candidate_swaps_calls'] >= result['find_best_swap_calls']
+    assert result['candidate_swaps_ns'] > 0
+    assert {k: v for k, v in result.items() if k in expected} == expected
+
+
+@pytest.mark.parametrize('engine', ['python'] + OTHER_ENGINES)
+@pytest.mark.parametrize('top_k', [0, -1])
+def test_find_best_swap_rejects_top_k_below_one(engine, top_k):
+    board = make_board(engine, 0, 9, 9)
+    board.resolve_all_cascades(rng=RefillStream(0))
+
+    with pytest.raises(ValueError):
+        board.find_best_swap(top_k=top_k)
+
+
+def test_board_grid_is_read_only():
+    board = make_board('python', 0, 5, 6)
+    assert [list(row) for row in board.grid] == board.to_rows()
+
+    with pytest.raises(TypeError):
+        board.grid[0][0] = 1
+
+
+@pytest.mark.parametrize('engine', ['python'] + OTHER_ENGINES)
+def test_to_rows_is_a_copy(engine):
+    board = make_board(engine, 0, 5, 6)
+    rows = board.to_rows()
+    assert rows == cells(board)
+
+    rows[0][0] = 0
+    assert board.cell(0, 0) != 0
+    # Copia nu scrie in tabla
@@ -0,0 +1,24 @@
+import random
+
+from play_candycrush import Board, play_single_game, refill_random
+
+
+def test_refill_stream_differs_from_initial_grid():
+    # Tabla initiala vine din random.seed(seed), refill-ul din refill_random(seed):
+    # refill-ul nu repeta celulele tablei de start
+
+    for seed in range(5):
+        random.seed(seed)
+        cells = [v for row in Board(11, 11).to_rows() for v in row]
+        rng = refill_random(seed)
+        assert [rng.randint(1, 4) for _ in cells] != cells
+
+
+def test_game_is_reproducible():
+    results = []
+
+    for _ in range(2):
+        random.seed(3)
+        results.append(play_single_game(9, 9, target=800, seed=3))
+
+    assert results[0] == results[1]
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from play_candycrush import ENGINES, RefillStream, np
+
+ENGINE_PARAMS = ['python', 'bitboard',
+                 pytest.param('numpy', marks=pytest.mark.skipif(np is None, reason='numpy nu este instalat'))]
+
+
+def random_board(engine, seed, rows, cols):
+    random.seed(seed)
+    board = ENGINES[engine](rows, cols)
+    board.resolve_all_cascades(rng=RefillStream(seed))
+    return board
+
+
+def brute_force_best(board, stream):
+    # Cel mai bun swap dintre toate swap-urile vecine, fiecare simulat pe o copie
+
+    best = None
+
+    for (r, c), (r2, c2) in board.adjacent_swaps():
+        sim = board.copy()
+        sim.swap((r, c), (r2, c2))
+        gained, casc = sim.resolve_all_cascades(rng=stream.child(r, c, r2, c2))
+
+        if gained > 0:
+            key = (gained, -casc, -r, -c, -r2, -c2)
+            if best is None or key > best[0]:
+                best = (key, (r, c), (r2, c2), gained, casc)
+
+    return best and best[1:]
+
+
+@pytest.mark.parametrize('engine', ENGINE_PARAMS)
+@pytest.mark.parametrize('seed', range(8))
+def test_candidates_are_exactly_the_scoring_swaps(engine, seed):
+    # Swap-urile respinse fara simulare (cele care nu formeaza nimic) aduc 0
+    # puncte, iar cele pastrate aduc puncte: exact setul gasit prin forta bruta
+
+    board = random_board(engine, seed, 7 + seed % 3, 8)
+    stream = RefillStream(seed)
+
+    scoring = []
+
+    for a, b in board.adjacent_swaps():
+        sim = board.copy()
+        sim.swap(a, b)
+        if sim.resolve_all_cascades(rng=stream.child(*a, *b))[0] > 0:
+            scoring.append((a, b))
+
+    assert sorted(map(tuple, board.candidate_swaps())) == sorted(scoring)
+    assert board.find_best_swap(stream=stream) == brute_force_best(board, stream)
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from play_candycrush import Board, TraceRecorder, play_single_game, replay_trace
+
+
+def cells(board):
+    return [[board.cell(r, c) for c in range(board.cols)] for r in range(board.rows)]
+
+
+def record_game(seed, moves):
+    # Joaca greedy cu trace, cu un reshuffle la fiecare 10 mutari si pe tablele
+    # fara mutari; swap-urile impare sunt date invers (b, a)
+
+    random.seed(seed)
+    board = Board(7, 7)
+    rng = random.Random(seed)
+    recorder = TraceRecorder(board, rng)
+    score, _ = board.resolve_all_cascades(rng=recorder, trace=recorder)
+    recorder.end_move()
+
+    for move in range(moves):
+        if move % 10 == 9 or not board.any_possible_swap_creates_formation():
+            if not board.reshuffle(rng):
+                break
+            recorder.reshuffle(board)
+
+        a, b, _, _ = board.find_best_swap()
+        board.swap(a, b)
+        recorder.swap(*((b, a) if move % 2 else (a, b)))
+        gained, _ = board.resolve_all_cascades(rng=recorder, trace=recorder)
+        recorder.end_move()
+        score += gained
+
+    return board, score, recorder.getvalue()
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_replay_trace_round_trip(seed):
+    board, score, data = record_game(seed, 35)
+    replayed, replayed_score = replay_trace(data)
+
+    assert replayed_score == score
+    assert cells(replayed) == cells(board)
+
+
+def test_replay_trace_matches_game_score():
+    result = play_single_game(6, 6, 3000, seed=3, reshuffle=2, trace=True)
+    _, score = replay_trace(result['trace'])
+
+    assert score == result['points']
+
+
+def test_trace_rejects_non_adjacent_swap():
+    board = Board(5, 5)
+    recorder = TraceRecorder(board, random.Random(0))
+
+    with pytest.raises(ValueError):
+        recorder.swap((0, 0), (1, 1))
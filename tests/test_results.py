@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+
+from play_candycrush import iter_columnar_chunks, load_results
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'play_candycrush.py')
+
+
+def run(out, *extra):
+    # Ruleaza jocuri mici si rapide prin linia de comanda
+    subprocess.run([sys.executable, SCRIPT, '--games', '6', '--rows', '7', '--cols', '7', '--target', '300',
+                    '--seed', '5', '--flush-every', '2', '--out', str(out), *extra], check=True)
+
+
+def test_resume_csv_matches_uninterrupted_run(tmp_path):
+    full = tmp_path / 'full.csv'
+    run(full)
+
+    partial = tmp_path / 'partial.csv'
+    lines = full.read_bytes().splitlines(keepends=True)
+    partial.write_bytes(b''.join(lines[:4]) + lines[4][:5])
+    # Antetul, 3 jocuri complete si un rand scris pe jumatate
+
+    run(partial, '--resume')
+
+    assert partial.read_bytes() == full.read_bytes()
+
+
+def test_csv_and_columnar_load_the_same_results(tmp_path):
+    csv_out, columnar_out = tmp_path / 'out.csv', tmp_path / 'out.bin'
+    run(csv_out)
+    run(columnar_out, '--out-format', 'columnar')
+
+    from_csv, from_columnar = load_results(csv_out), load_results(columnar_out)
+
+    assert list(from_csv) == list(from_columnar)
+    assert from_csv == from_columnar
+    assert list(from_csv['game_id']) == list(range(6))
+
+
+def test_resume_columnar_matches_uninterrupted_run(tmp_path):
+    full = tmp_path / 'full.bin'
+    run(full, '--out-format', 'columnar')
+
+    ends = [pos for pos, _ in iter_columnar_chunks(full)]
+    # Pozitiile de dupa antet si de dupa fiecare lot de 2 jocuri
+    assert len(ends) == 4
+
+    partial = tmp_path / 'partial.bin'
+    partial.write_bytes(full.read_bytes()[:ends[2] + 7])
+    # Antetul, 2 loturi complete si un lot scris pe jumatate
+
+    run(partial, '--out-format', 'columnar', '--resume')
+
+    assert load_results(partial) == load_results(full)
+    assert partial.read_bytes() == full.read_bytes()
+
+
+def test_bad_predefined_board_leaves_out_untouched(tmp_path):
+    boards = [[[1 + (r + c) % 4 for c in range(7)] for r in range(7)] for _ in range(3)]
+    boards[2][0][0] = 9
+    # Doar a treia tabla este gresita
+    source = tmp_path / 'boards.json'
+    source.write_text(json.dumps(boards))
+    out = tmp_path / 'out.csv'
+    out.write_text('rezultate vechi\n')
+
+    proc = subprocess.run([sys.executable, SCRIPT, '--games', '3', '--rows', '7', '--cols', '7',
+                           '--input_predefined', '--input_file', str(source), '--out', str(out)],
+                          capture_output=True, text=True)
+
+    assert proc.returncode == 2
+    assert 'tabla 2' in proc.stderr and 'Traceback' not in proc.stderr
+    assert out.read_text() == 'rezultate vechi\n'
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from play_candycrush import ENGINES, RefillStream, SearchPlayer, TranspositionTable, np
+
+ENGINE_PARAMS = ['python', 'bitboard',
+                 pytest.param('numpy', marks=pytest.mark.skipif(np is None, reason='numpy nu este instalat'))]
+
+
+def stable_board(engine, seed, rows=8, cols=8):
+    random.seed(seed)
+    board = ENGINES[engine](rows, cols)
+    board.resolve_all_cascades(rng=RefillStream(seed, -1))
+    return board
+
+
+@pytest.mark.parametrize('engine', ENGINE_PARAMS)
+@pytest.mark.parametrize('seed', range(5))
+def test_depth_one_equals_find_best_swap(engine, seed):
+    board = stable_board(engine, seed)
+    stream = RefillStream(seed)
+
+    assert SearchPlayer(depth=1).choose(board, stream) == board.find_best_swap(stream=stream)
+
+
+@pytest.mark.parametrize('engine', ENGINE_PARAMS)
+@pytest.mark.parametrize('samples', [0, 2])
+def test_search_leaves_board_unchanged(engine, samples):
+    # mark()/undo() din cautare refac exact tabla si hash-ul
+    board = stable_board(engine, 3)
+    before, hash_before = board.to_rows(), board.hash
+
+    SearchPlayer(depth=3, beam=4, samples=samples).choose(board, RefillStream(3))
+
+    assert board.to_rows() == before
+    assert board.hash == hash_before == board.compute_hash()
+
+
+@pytest.mark.parametrize('engine', ENGINE_PARAMS)
+def test_table_does_not_change_the_choice(engine):
+    # Cu table, copiii gasiti in cache sunt resimulati; alegerea ramane aceeasi
+    board = stable_board(engine, 4)
+    table = TranspositionTable()
+    cached = SearchPlayer(depth=3, beam=4, table=table)
+
+    for move in range(3):
+        stream = RefillStream(4, move)
+        assert cached.choose(board, stream) == SearchPlayer(depth=3, beam=4).choose(board, stream)
+
+    assert table.hits > 0
@@ -0,0 +1,48 @@
+import itertools
+import random
+
+import pytest
+
+from play_candycrush import Board, select_non_overlapping, select_optimal
+
+
+def brute_force_score(forms):
+    # Scorul maxim al unei submultimi fara suprapuneri, incercand toate submultimile
+
+    best = 0
+
+    for k in range(len(forms) + 1):
+        for subset in itertools.combinations(forms, k):
+            used = 0
+            for f in subset:
+                if f.mask & used:
+                    break
+                used |= f.mask
+            else:
+                best = max(best, sum(f.score for f in subset))
+
+    return best
+
+
+BEATS_GREEDY = [202, 340, 468, 514, 565, 580, 649, 770]
+# Seed-uri (table 6x7) pe care selectia optima bate greedy
+
+
+@pytest.mark.parametrize('seed', list(range(40)) + BEATS_GREEDY)
+def test_select_optimal_matches_brute_force(seed):
+    random.seed(seed)
+    forms = Board(6, 7).detect_formations()[:16]
+    # Table mici, nestabilizate: multe formatii care se suprapun
+
+    chosen = select_optimal(forms)
+    used = 0
+
+    for f in chosen:
+        assert not f.mask & used
+        used |= f.mask
+
+    score = sum(f.score for f in chosen)
+    greedy = sum(f.score for f in select_non_overlapping(forms))
+
+    assert score == brute_force_score(forms)
+    assert score > greedy if seed in BEATS_GREEDY else score >= greedy
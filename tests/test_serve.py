@@ -0,0 +1,89 @@
+import asyncio
+import os
+import random
+
+import pytest
+
+from play_candycrush import Board
+from serve_candycrush import MAX_SIDE, BestMoveService, Client, parse_request, serve_unix, solve
+
+GRID = [[1, 2, 3], [2, 3, 1], [3, 1, 2]]
+
+
+def test_parse_request_accepts_defaults():
+    op, task, timeout = parse_request({'grid': GRID, 'top_k': 2, 'seed': 7}, 5)
+    assert op == 'best' and timeout == 5
+    assert task == {'grid': GRID, 'engine': 'python', 'top_k': 2, 'seed': 7}
+
+
+@pytest.mark.parametrize('extra', [{'top_k': 0}, {'top_k': -3}, {'top_k': True}, {'seed': True},
+                                   {'timeout': True}, {'timeout': 0}])
+def test_parse_request_rejects_bad_options(extra):
+    with pytest.raises(ValueError):
+        parse_request(dict({'grid': GRID}, **extra), 5)
+
+
+def test_parse_request_rejects_bool_cells():
+    with pytest.raises(ValueError):
+        parse_request({'grid': [[True, 2, 3], [2, 3, 1], [3, 1, 2]]}, 5)
+
+
+def test_parse_request_rejects_huge_grid():
+    side = MAX_SIDE + 1
+    with pytest.raises(ValueError):
+        parse_request({'grid': [[1 + (r + c) % 3 for c in range(side)] for r in range(side)]}, 5)
+
+
+def stable_grid(seed, rows=11, cols=11):
+    rng = random.Random(seed)
+    board = Board(rows, cols, grid=[[rng.randint(1, 4) for _ in range(cols)] for _ in range(rows)])
+    board.resolve_all_cascades(rng)
+    return board.to_rows()
+
+
+async def exercise_service(path):
+    # Serviciul si clientul in acelasi proces, pe un socket Unix
+
+    service = BestMoveService(workers=1, batch_size=4, timeout=5, warm=((11, 11),))
+    await service.start()
+    server = asyncio.create_task(serve_unix(service, path))
+
+    while not os.path.exists(path):
+        await asyncio.sleep(0.01)
+
+    client = await Client.connect(path)
+
+    try:
+        grids = [stable_grid(seed) for seed in range(6)]
+        responses = await asyncio.gather(*(client.best_swap(g, seed=3) for g in grids))
+
+        for grid, response in zip(grids, responses):
+            assert {k: v for k, v in response.items() if k not in ('id', 'ms')} == \
+                solve({'grid': grid, 'engine': 'python', 'top_k': None, 'seed': 3})
+
+        stats = await client.stats()
+        assert stats['batches'] < len(grids)
+        # Cu un singur proces, cererile care asteapta pleaca impreuna
+
+        bad = await client.best_swap([[1, 2, 9], [2, 3, 1], [3, 1, 2]])
+        assert 'error' in bad and 'swap' not in bad
+
+        slow = await client.best_swap(stable_grid(0, MAX_SIDE, MAX_SIDE), timeout=0.05)
+        assert slow['error'] == 'timeout'
+
+        after = await client.best_swap(grids[0], seed=3, timeout=5)
+        assert after['swap'] == responses[0]['swap']
+        # Procesul blocat pe lotul expirat a fost inlocuit, deci cererea urmatoare nu asteapta dupa el
+
+        stats = await client.stats()
+        assert stats['timeouts'] == 1 and stats['recycled'] == 1 and stats['errors'] == 1
+        assert stats['in_flight'] == 0
+    finally:
+        await client.close()
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+        await service.close()
+
+
+def test_service_batches_times_out_and_reports_errors(tmp_path):
+    asyncio.run(exercise_service(str(tmp_path / 's.sock')))
@@ -0,0 +1,34 @@
+from play_candycrush import iter_trace_file, resume_trace, write_trace_record
+
+
+def write_records(path, records):
+    with open(path, 'wb') as fh:
+        for gid, data in records:
+            write_trace_record(fh, gid, data)
+
+
+def test_resume_trace_cuts_partial_tail(tmp_path):
+    path = tmp_path / 'trace.bin'
+    write_records(path, [(0, b'a' * 5), (1, b'b' * 7), (2, b'c' * 300)])
+    path.write_bytes(path.read_bytes()[:-10])
+    # Ultimul joc a fost scris doar partial
+
+    assert resume_trace(str(path), {0, 1}) == 2
+    assert list(iter_trace_file(str(path))) == [(0, b'a' * 5), (1, b'b' * 7)]
+
+    with open(path, 'ab') as fh:
+        write_trace_record(fh, 2, b'c' * 3)
+
+    assert [gid for gid, _ in iter_trace_file(str(path))] == [0, 1, 2]
+
+
+def test_resume_trace_drops_games_without_results(tmp_path):
+    path = tmp_path / 'trace.bin'
+    write_records(path, [(0, b'a'), (1, b'b'), (2, b'c'), (1, b'b'), (3, b'd')])
+
+    assert resume_trace(str(path), {0, 1, 3}) == 3
+    assert list(iter_trace_file(str(path))) == [(0, b'a'), (1, b'b'), (3, b'd')]
+
+
+def test_resume_trace_missing_file(tmp_path):
+    assert resume_trace(str(tmp_path / 'none.bin'), {0}) == 0
@@ -10,11 +10,21 @@ import tkinter as tk
 from tkinter import ttk
 # Importam widget-uri moderne din Tkinter (butoane, label-uri etc.)
 
+import multiprocessing
+# Cautarea mutarii ruleaza intr-un proces separat, ca fereastra sa nu inghete
+
+import queue
+# Exceptia queue.Empty, cand rezultatul cautarii nu a sosit inca
+
 import random
 # Modul pentru generare de valori aleatoare
 
-from play_candycrush import Board, select_non_overlapping
-# Importam logica jocului: tabla si functia de selectie a formatiilor
+import time
+# Masurarea latentei cautarii
+
+from play_candycrush import (Board, RefillStream, decode_trace, iter_trace_file, replay_cascade,
+                             select_non_overlapping)
+# Importam logica jocului: tabla, functia de selectie a formatiilor si citirea trace-urilor
 
 
 COLOR_MAP = {
@@ -36,12 +46,86 @@ CELL_SIZE = 40
 PADDING = 6
 # Spatiul dintre celule
 
+OUTLINE = {'outline': '#333333', 'width': 2}
+# Conturul normal al unei celule (evidentierile se sterg revenind la el)
+
+POLL_MS = 20
+# La cate milisecunde verificam daca a sosit rezultatul cautarii
+
+MIN_SPEED = 50
+# Cea mai mica pauza (ms) intre pasii animatiei
+
+
+def search_worker(tasks, results):
+    # Bucla procesului de cautare: primeste (job, tabla, flux) si trimite
+    # inapoi (job, cel mai bun swap); None opreste procesul
+    for job, board, stream in iter(tasks.get, None):
+        results.put((job, board.find_best_swap(stream=stream)))
+
+
+class SearchWorker:
+    """
+    Proces de fundal pentru find_best_swap. submit() trimite o copie a tablei,
+    poll() (apelat din after, fara sa blocheze) intoarce rezultatul cand
+    soseste, cancel() opreste o cautare in curs omorand procesul; urmatorul
+    submit() porneste altul. Rezultatele unui job anulat sunt ignorate.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.tasks = self.results = None
+        self.job = 0
+        # Numarul ultimului job trimis
+        self.pending = False
+        # True cat timp asteptam rezultatul ultimului job
+
+    def submit(self, board, stream=None):
+        if self.process is None:
+            self.tasks = multiprocessing.Queue()
+            self.results = multiprocessing.Queue()
+            self.process = multiprocessing.Process(target=search_worker, args=(self.tasks, self.results),
+                                                   daemon=True)
+            self.process.start()
+
+        self.job += 1
+        self.pending = True
+        self.tasks.put((self.job, board, stream))
+        # Tabla este serializata la trimitere, deci jocul poate continua pe original
+
+    def poll(self):
+        # (True, rezultat) daca a sosit rezultatul ultimului job, altfel (False, None)
+        while self.pending:
+            try:
+                job, best = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if job == self.job:
+                self.pending = False
+                return True, best
+
+        return False, None
+
+    def cancel(self):
+        # Opreste cautarea in curs (daca exista)
+        if self.pending:
+            self.close()
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+        self.pending = False
+
 
 class CandyUI:
     # Clasa care se ocupa de interfata grafica a jocului
 
-    def __init__(self, master, rows=11, cols=11, seed=None, speed=1200):
+    def __init__(self, master, rows=11, cols=11, seed=None, speed=1200, trace=None, fps=30):
         # Constructorul clasei
+        # trace (optional): un joc inregistrat (vezi TraceRecorder), redat mutare cu mutare
+        # fps: de cate ori pe secunda redesenam tabla in derularea rapida (Jump)
 
         self.master = master
         # Fereastra principala Tkinter
@@ -61,6 +145,26 @@ class CandyUI:
         self.running = False
         # Flag care indica daca jocul ruleaza sau nu
 
+        self.moves = None
+        # Mutarile din trace care mai trebuie redate (None = joc automat)
+
+        self.cascades = []
+        # Cascadele din trace ramase pentru mutarea curenta
+
+        self.fps = fps
+        # Rata de redesenare in derularea rapida
+
+        self.ff_target = None
+        # Swap-ul pana la care derulam rapid (None = animatie normala)
+
+        self.last_frame = 0.0
+        # Momentul ultimei redesenari din derularea rapida
+
+        if trace is not None:
+            self.rows, self.cols, grid, moves = decode_trace(trace)
+            rows, cols = self.rows, self.cols
+            # Dimensiunile vin din trace
+
         # ===== CONTROLS =====
         ctrl = ttk.Frame(master)
         # Cream un container pentru controale
@@ -87,7 +191,7 @@ class CandyUI:
         # Variabila legata de valoarea din Spinbox
 
         ttk.Spinbox(
-            ctrl, from_=600, to=4000, increment=200,
+            ctrl, from_=MIN_SPEED, to=4000, increment=50,
             # Limitele si pasul pentru viteza
             textvariable=self.speed_var, width=7,
             # Variabila controlata si latimea
@@ -95,6 +199,17 @@ class CandyUI:
             # Functie apelata la modificarea valorii
         ).pack(side='left')
 
+        ttk.Label(ctrl, text='Jump to swap:').pack(side='left', padx=12)
+        # Eticheta pentru derularea rapida
+
+        self.jump_var = tk.IntVar(value=0)
+        # Swap-ul la care vrem sa ajungem
+
+        ttk.Spinbox(ctrl, from_=0, to=1000000, increment=10, textvariable=self.jump_var, width=7).pack(side='left')
+
+        ttk.Button(ctrl, text='Jump', command=self.jump).pack(side='left', padx=6)
+        # Derulare rapida (fara animatie) pana la swap-ul ales, apoi animatie normala
+
         self.status = ttk.Label(ctrl, text='Score: 0 | Swaps: 0')
         # Label pentru afisarea scorului si a mutarilor
 
@@ -117,18 +232,53 @@ class CandyUI:
         self.rects = {}
         # Dictionar care retine dreptunghiurile desenate pe canvas
 
+        self.shown = {}
+        # Valoarea afisata acum in fiecare celula (ce a desenat ultimul draw_grid)
+
+        self.outlined = set()
+        # Celulele evidentiate (contur colorat) de la ultimul draw_grid
+
         self.rng = random.Random(seed)
         # Generator random cu seed
 
-        self.board = Board(rows, cols)
-        # Cream tabla de joc folosind logica din play_candycrush
+        self.lookahead = RefillStream(seed if seed is not None else random.getrandbits(64))
+        # Refill-ul simularilor din cautare (ca in play_single_game), independent de proces
+
+        self.worker = SearchWorker()
+        # Cautarea mutarii, in fundal
+
+        self.search_started = None
+        # Momentul trimiterii cautarii in curs (None = nicio cautare)
+
+        self.search_ms = None
+        # Latenta ultimei cautari, afisata in status
+
+        master.protocol('WM_DELETE_WINDOW', self.close)
+        # La inchiderea ferestrei oprim si procesul de cautare
+
+        if trace is None:
+            self.board = Board(rows, cols)
+            # Cream tabla de joc folosind logica din play_candycrush
 
-        self.score, _ = self.board.resolve_all_cascades(self.rng)
-        # Eliminam eventualele formatii initiale si calculam scorul
+            self.score, _ = self.board.resolve_all_cascades(self.rng)
+            # Eliminam eventualele formatii initiale si calculam scorul
+        else:
+            self.board = Board(rows, cols, grid=grid)
+            self.score = 0
+
+            for forms, values in moves[0][2]:
+                self.score += sum(f.score for f in forms)
+                replay_cascade(self.board, forms, values)
+            # Cascadele initiale din trace, aplicate direct
+
+            self.moves = iter(moves[1:])
 
         self.swaps = 0
         # Initializam numarul de mutari
 
+        self.create_cells()
+        # Cream dreptunghiurile o singura data
+
         self.draw_grid()
         # Desenam tabla initiala
 
@@ -140,8 +290,22 @@ class CandyUI:
 
     def update_speed(self):
         # Actualizeaza viteza jocului
-        self.speed = max(400, int(self.speed_var.get()))
-        # Ne asiguram ca viteza nu scade sub 400 ms
+        self.speed = max(MIN_SPEED, int(self.speed_var.get()))
+        # Ne asiguram ca viteza nu scade sub MIN_SPEED ms
+
+    def jump(self, target=None):
+        # Deruleaza rapid pana la swap-ul target (implicit cel din spinbox);
+        # daca jocul ruleaza, derularea incepe la urmatoarea mutare
+        target = int(self.jump_var.get()) if target is None else target
+
+        if target <= self.swaps:
+            return
+
+        self.ff_target = target
+        self.update_status()
+
+        if not self.running:
+            self.start_game()
 
     def start_game(self):
         # Porneste jocul automat
@@ -163,17 +327,64 @@ class CandyUI:
         self.running = False
         # Setam flag-ul ca fals
 
+        self.worker.cancel()
+        self.search_started = None
+        # Anulam cautarea in curs, daca exista
+
+        self.ff_target = None
+        # Si derularea rapida
+
         self.play_btn.config(state='normal')
         # Reactivam butonul Play
 
+        self.update_status()
+
+    def close(self):
+        # Inchide fereastra si procesul de cautare
+        self.running = False
+        self.worker.close()
+        self.master.destroy()
+
     def game_loop(self):
         # Bucla principala a jocului
         if not self.running:
             return
         # Daca jocul este oprit, iesim
 
-        best = self.board.find_best_swap()
-        # Cautam cea mai buna mutare posibila
+        if self.ff_target is not None:
+            self.fast_forward()
+            # Derulare rapida ceruta cu Jump
+            return
+
+        if self.moves is not None:
+            self.replay_move()
+            # Redam urmatoarea mutare din trace in loc sa cautam
+            return
+
+        self.worker.submit(self.board, self.lookahead.child(self.swaps))
+        self.search_started = time.perf_counter()
+        # Cautam cea mai buna mutare posibila, in procesul de fundal
+
+        self.update_status()
+
+        self.master.after(POLL_MS, self.poll_search)
+        # Fereastra ramane activa; verificam periodic daca a sosit rezultatul
+
+    def poll_search(self):
+        # Preia rezultatul cautarii, cand soseste, si aplica mutarea
+        if not self.running or self.search_started is None:
+            return
+        # Jocul a fost oprit (cautarea a fost anulata)
+
+        done, best = self.worker.poll()
+
+        if not done:
+            self.master.after(POLL_MS, self.poll_search)
+            return
+
+        self.search_ms = (time.perf_counter() - self.search_started) * 1000
+        self.search_started = None
+        # Latenta vazuta de interfata: trimitere + cautare + primirea rezultatului
 
         if best is None:
             self.stop_game()
@@ -201,11 +412,144 @@ class CandyUI:
         self.master.after(self.speed, self.resolve_cascades)
         # Trecem la rezolvarea cascadelor
 
+    def fast_forward(self):
+        # Derulare rapida: mutari intregi (swap + toate cascadele) fara animatie,
+        # cat incape intr-un cadru (1 / fps secunde); tabla se redeseneaza o data
+        # pe cadru. La swap-ul tinta revenim la animatia normala
+        if not self.running:
+            return
+
+        frame = 1 / self.fps
+        frame_end = time.perf_counter() + frame
+
+        while self.swaps < self.ff_target and time.perf_counter() < frame_end:
+            if self.moves is not None:
+                if not self.replay_headless():
+                    self.stop_game()
+                    self.draw_grid()
+                    # Trace-ul s-a terminat
+                    return
+                continue
+
+            if self.search_started is None:
+                self.worker.submit(self.board, self.lookahead.child(self.swaps))
+                self.search_started = time.perf_counter()
+                # Aceeasi cautare in fundal ca la animatie
+
+            done, best = self.worker.poll()
+
+            if not done:
+                break
+                # Asteptam rezultatul fara sa blocam fereastra
+
+            self.search_ms = (time.perf_counter() - self.search_started) * 1000
+            self.search_started = None
+
+            if best is None:
+                self.stop_game()
+                self.draw_grid()
+                # Nu mai exista mutari
+                return
+
+            a, b, _, _ = best
+            self.board.swap(a, b)
+            self.swaps += 1
+            gained, _ = self.board.resolve_all_cascades(self.rng)
+            self.score += gained
+            # Aceleasi cascade ca in animatie (select_non_overlapping, refill din self.rng)
+
+        now = time.perf_counter()
+        reached = self.swaps >= self.ff_target
+
+        if reached:
+            self.ff_target = None
+
+        if reached or now - self.last_frame >= frame:
+            self.last_frame = now
+            self.draw_grid()
+            self.update_status()
+            # Redesenam doar o data pe cadru
+
+        if reached:
+            self.master.after(self.speed, self.game_loop)
+            # Continuam cu animatia normala
+        else:
+            self.master.after(1, self.fast_forward)
+
+    def replay_headless(self):
+        # Aplica urmatoarea mutare din trace cu toate cascadele ei, fara animatie;
+        # intoarce False cand trace-ul s-a terminat
+        move = next(self.moves, None)
+
+        if move is None:
+            return False
+
+        kind, payload, cascades = move
+
+        if kind == 'reshuffle':
+            self.apply_reshuffle(payload)
+            return True
+
+        self.board.swap(*payload)
+        self.swaps += 1
+
+        for forms, values in cascades:
+            self.score += sum(f.score for f in forms)
+            replay_cascade(self.board, forms, values)
+
+        return True
+
+    def apply_reshuffle(self, grid):
+        # Tabla amestecata (reshuffle) din trace
+        for r, row in enumerate(grid):
+            for c, v in enumerate(row):
+                self.board.set_cell(r, c, v)
+
+    def replay_move(self):
+        # Urmatoarea mutare din trace: swap (urmat de cascadele lui) sau reshuffle
+        move = next(self.moves, None)
+
+        if move is None:
+            self.stop_game()
+            # Trace-ul s-a terminat
+            return
+
+        kind, payload, cascades = move
+
+        if kind == 'reshuffle':
+            self.apply_reshuffle(payload)
+            self.draw_grid()
+            self.master.after(self.speed, self.game_loop)
+            return
+
+        a, b = payload
+        self.cascades = list(cascades)
+
+        self.highlight_swap(a, b)
+        self.board.swap(a, b)
+        self.swaps += 1
+        self.update_status()
+        self.draw_grid()
+
+        self.master.after(self.speed, self.resolve_cascades)
+
     def resolve_cascades(self):
         # Rezolva formatiile aparute dupa o mutare
         if not self.running:
             return
 
+        if self.moves is not None:
+            # Redare: formatiile si refill-ul vin din trace
+            if not self.cascades:
+                self.draw_grid()
+                self.master.after(self.speed, self.game_loop)
+                return
+
+            selected, values = self.cascades.pop(0)
+            self.highlight_elimination(selected)
+            self.master.after(self.speed, lambda: self.apply_elimination(selected, values))
+            return
+
         forms = self.board.detect_formations()
         # Detectam toate formatiile existente
 
@@ -225,16 +569,21 @@ class CandyUI:
         self.master.after(self.speed, lambda: self.apply_elimination(selected))
         # Aplicam eliminarea dupa un delay
 
-    def apply_elimination(self, selected):
+    def apply_elimination(self, selected, values=None):
         # Elimina formatiile selectate
+        # values: refill-ul salvat in trace (None = bomboane random)
         if not self.running:
             return
 
-        self.board.apply_eliminations(selected)
-        # Setam celulele eliminate la 0
+        if values is None:
+            self.board.apply_eliminations(selected)
+            # Setam celulele eliminate la 0
 
-        self.board.apply_gravity_and_refill(self.rng)
-        # Aplicam gravitatia si generam bomboane noi
+            self.board.apply_gravity_and_refill(self.rng)
+            # Aplicam gravitatia si generam bomboane noi
+        else:
+            replay_cascade(self.board, selected, values)
+            # Eliminare + gravitatie cu valorile din trace
 
         self.score += sum(f.score for f in selected)
         # Adaugam scorul obtinut
@@ -257,6 +606,7 @@ class CandyUI:
             rect = self.rects.get(cell)
             if rect:
                 self.canvas.itemconfigure(rect, outline='#8e44ad', width=5)
+                self.outlined.add(cell)
 
     def highlight_elimination(self, formations):
         # Evidentiaza celulele care vor fi eliminate
@@ -268,23 +618,19 @@ class CandyUI:
             rect = self.rects.get((r, c))
             if rect:
                 self.canvas.itemconfigure(rect, outline='#e74c3c', width=5)
+                self.outlined.add((r, c))
 
-    def draw_grid(self):
-        # Deseneaza intreaga tabla de joc
+    def create_cells(self):
+        # Deseneaza dreptunghiurile tablei o singura data; draw_grid doar le recoloreaza
         self.canvas.delete('all')
         # Stergem tot ce este desenat
 
         self.rects.clear()
-        # Golim dictionarul de dreptunghiuri
+        self.shown.clear()
+        self.outlined.clear()
 
         for r in range(self.rows):
             for c in range(self.cols):
-                val = self.board.cell(r, c)
-                # Citim valoarea celulei
-
-                color = COLOR_MAP[val]
-                # Alegem culoarea corespunzatoare
-
                 x1 = PADDING + c * (CELL_SIZE + PADDING)
                 y1 = PADDING + r * (CELL_SIZE + PADDING)
                 # Coordonatele coltului stanga-sus
@@ -293,23 +639,47 @@ class CandyUI:
                 y2 = y1 + CELL_SIZE
                 # Coordonatele coltului dreapta-jos
 
-                rect = self.canvas.create_rectangle(
-                    x1, y1, x2, y2,
-                    fill=color,
-                    outline='#333333',
-                    width=2
-                )
-                # Desenam patratul pe canvas
+                rect = self.canvas.create_rectangle(x1, y1, x2, y2, fill=COLOR_MAP[0], **OUTLINE)
+                # Desenam patratul pe canvas (culoarea reala vine din draw_grid)
 
                 self.rects[(r, c)] = rect
                 # Salvam referinta dreptunghiului
 
-        self.master.update_idletasks()
-        # Fortam actualizarea interfetei
+                self.shown[(r, c)] = 0
+
+    def draw_grid(self):
+        # Aduce canvas-ul la starea tablei: recoloram doar celulele a caror
+        # valoare s-a schimbat fata de ultimul desen si stergem doar contururile
+        # puse de highlight_*. Tk redeseneaza singur cand bucla e libera.
+        grid = self.board.to_rows()
+        # O singura copie a tablei
+
+        for (r, c), shown in self.shown.items():
+            val = grid[r][c]
+
+            if val != shown:
+                self.canvas.itemconfigure(self.rects[(r, c)], fill=COLOR_MAP[val])
+                self.shown[(r, c)] = val
+                # Actualizam doar celulele schimbate
+
+        for cell in self.outlined:
+            self.canvas.itemconfigure(self.rects[cell], **OUTLINE)
+        self.outlined.clear()
+        # Revenim la conturul normal doar unde am evidentiat ceva
 
     def update_status(self):
         # Actualizeaza textul de status
-        self.status.config(text=f'Score: {self.score} | Swaps: {self.swaps}')
+        text = f'Score: {self.score} | Swaps: {self.swaps}'
+
+        if self.search_started is not None:
+            text += ' | Search: ...'
+        elif self.search_ms is not None:
+            text += f' | Search: {self.search_ms:.0f} ms'
+
+        if self.ff_target is not None:
+            text += f' | Jump to {self.ff_target}'
+
+        self.status.config(text=text)
 
 
 # ===== MAIN =====
@@ -326,23 +696,50 @@ if __name__ == '__main__':
     parser.add_argument('--speed', type=int, default=1200)
     # Argument pentru viteza jocului
 
+    parser.add_argument('--trace', type=str, default=None)
+    # Fisier de trace-uri (--trace-out din play_candycrush.py) de redat
+
+    parser.add_argument('--game', type=int, default=0)
+    # Jocul (game_id) din fisierul de trace-uri
+
+    parser.add_argument('--fps', type=int, default=30)
+    # Rata de redesenare in derularea rapida
+
+    parser.add_argument('--jump', type=int, default=0)
+    # Deruleaza rapid pana la acest swap imediat dupa pornire, apoi animatie normala
+
     args = parser.parse_args()
     # Citim argumentele
 
+    trace = None
+
+    if args.trace:
+        trace = next((t for gid, t in iter_trace_file(args.trace) if gid == args.game), None)
+        # Cautam trace-ul jocului cerut
+
+        if trace is None:
+            parser.error(f'--trace {args.trace} nu contine jocul {args.game}')
+
     root = tk.Tk()
     # Cream fereastra principala
 
     root.title('Candy Crush – Visual Automator')
     # Setam titlul ferestrei
 
-    CandyUI(
+    ui = CandyUI(
         root,
         rows=11,
         cols=11,
         seed=args.seed,
-        speed=args.speed
+        speed=args.speed,
+        trace=trace,
+        fps=max(1, args.fps)
     )
     # Initializam interfata jocului
 
+    if args.jump:
+        ui.jump(args.jump)
+        # Pornim direct cu derularea rapida
+
     root.mainloop()
     # Pornim bucla grafica Tkinter